@@ -25,6 +25,11 @@ async def connect_to_mongo():
             maxIdleTimeMS=45000,
             socketTimeoutMS=20000,
             connectTimeoutMS=20000,
+            # Wire compression - diagram_data payloads are large JSON-like
+            # blobs that compress well. The driver negotiates the first
+            # algorithm the server also supports; zlib is always available.
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=6,
         )
         
         # Get database name from URL or use default
@@ -1,21 +1,45 @@
+import os
+
+# Motor sizes its blocking-call thread pool from this at import time. A
+# single worker avoids lock contention in the BSON decoder; queries stay
+# bounded via explicit to_list limits in the services.
+os.environ.setdefault("MOTOR_MAX_WORKERS", "1")
+
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 import uvicorn
-import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from contextlib import asynccontextmanager
 
 from routers import auth, scenarios, diagrams, scoring, learning, analytics, gamification
-from database.connection import connect_to_mongo, close_mongo_connection
+from database.connection import connect_to_mongo, close_mongo_connection, get_database
+from services.diagram_service import start_version_flusher, stop_version_flusher
+from services.gamification_service import GamificationService
+from services.learning_service import LearningService
+from services.scenario_service import ScenarioService
+from services.scoring_service import ScoringService, start_score_flusher, stop_score_flusher
+import asyncio
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    db = await get_database()
+    start_version_flusher(db)
+    start_score_flusher(db)
+    # One-shot index setup for the hot query shapes
+    await asyncio.gather(
+        GamificationService(db).ensure_indexes(),
+        LearningService(db).ensure_indexes(),
+        ScenarioService(db).ensure_indexes(),
+        ScoringService(db).ensure_indexes()
+    )
     yield
     # Shutdown
+    await stop_score_flusher()
+    await stop_version_flusher()
     await close_mongo_connection()
 
 
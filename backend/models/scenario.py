@@ -58,7 +58,9 @@ class ScenarioResponse(BaseModel):
     def from_dict(cls, data):
         if "_id" in data:
             data["_id"] = str(data["_id"])
-        return cls(**data)
+        # model_validate feeds the dict straight to the compiled
+        # pydantic-core validator, skipping Python-level kwargs unpacking
+        return cls.model_validate(data)
 
 
 class ScenarioInDB(BaseModel):
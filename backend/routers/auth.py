@@ -34,8 +34,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     
     db = await get_database()
     auth_service = AuthService(db)
-    user = await auth_service.get_user_by_id(user_id)
-    
+    user = await auth_service.get_user_from_token_payload(payload)
+
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
+from bson import ObjectId
 from database.connection import get_database
 from models.diagram import DiagramCreate, DiagramUpdate, DiagramResponse
 from models.user import UserResponse
@@ -9,6 +10,16 @@ from services.diagram_service import DiagramService
 router = APIRouter()
 
 
+async def parse_diagram_id(diagram_id: str) -> ObjectId:
+    """Validate and parse the diagram id path parameter once per request"""
+    if not ObjectId.is_valid(diagram_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Diagram not found"
+        )
+    return ObjectId(diagram_id)
+
+
 @router.get("/", response_model=List[DiagramResponse])
 async def get_diagrams(
     scenario_id: Optional[str] = Query(None),
@@ -28,7 +39,7 @@ async def get_diagrams(
 
 @router.get("/{diagram_id}", response_model=DiagramResponse)
 async def get_diagram(
-    diagram_id: str,
+    diagram_id: ObjectId = Depends(parse_diagram_id),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get diagram by ID"""
@@ -73,8 +84,8 @@ async def create_diagram(
 
 @router.put("/{diagram_id}", response_model=DiagramResponse)
 async def update_diagram(
-    diagram_id: str,
     diagram_data: DiagramUpdate,
+    diagram_id: ObjectId = Depends(parse_diagram_id),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Update diagram"""
@@ -107,7 +118,7 @@ async def update_diagram(
 
 @router.delete("/{diagram_id}")
 async def delete_diagram(
-    diagram_id: str,
+    diagram_id: ObjectId = Depends(parse_diagram_id),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Delete diagram"""
@@ -140,7 +151,7 @@ async def delete_diagram(
 
 @router.post("/{diagram_id}/submit")
 async def submit_diagram(
-    diagram_id: str,
+    diagram_id: ObjectId = Depends(parse_diagram_id),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Submit diagram for scoring"""
@@ -177,7 +188,7 @@ async def submit_diagram(
 
 @router.post("/{diagram_id}/duplicate", response_model=DiagramResponse)
 async def duplicate_diagram(
-    diagram_id: str,
+    diagram_id: ObjectId = Depends(parse_diagram_id),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Duplicate an existing diagram"""
@@ -1,10 +1,57 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from models.user import UserCreate, UserInDB, UserLogin, UserResponse
-from utils.security import get_password_hash, verify_password, create_access_token
+from utils.security import (
+    get_password_hash, get_password_hash_async, verify_password_async,
+    create_access_token, ACCESS_TOKEN_EXPIRE_HOURS
+)
 from typing import Optional
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
+import time
 import uuid
 
+# Hash compared against when the login email doesn't exist, so the response
+# time doesn't reveal whether an account exists
+_DUMMY_PASSWORD_HASH = get_password_hash("not-a-real-password")
+
+# Keep strong references to fire-and-forget tasks so they aren't garbage
+# collected before completion
+_background_tasks = set()
+
+# Session cache: token jti -> (expiry, UserResponse). Saves the Mongo user
+# lookup on every authenticated request for the lifetime of the token.
+# Per-process, so each worker warms its own cache. LRU-bounded: jtis are
+# per-login UUIDs, so without a cap abandoned logins would pile up until
+# the process restarts.
+_session_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_user_sessions = {}  # user_id -> set of jtis, for invalidation
+_SESSION_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_HOURS * 3600
+_SESSION_CACHE_MAX = 4096
+
+
+def _drop_session(jti: str, user_id: str):
+    """Remove one cached session and its reverse-index entry"""
+    _session_cache.pop(jti, None)
+    jtis = _user_sessions.get(user_id)
+    if jtis is not None:
+        jtis.discard(jti)
+        if not jtis:
+            _user_sessions.pop(user_id, None)
+
+# Allowed profile-update keys, mapped onto their embedded documents
+_PROFILE_KEYS = frozenset({"first_name", "last_name", "avatar_url", "bio"})
+_PREFERENCE_KEYS = frozenset({"theme", "notifications"})
+
+
+def _spawn_background_task(coro):
+    """Run a coroutine in the background without blocking the caller"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 
 class AuthService:
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -20,7 +67,7 @@ class AuthService:
 
         # Create user document
         user_dict = user_data.dict()
-        user_dict["password_hash"] = get_password_hash(user_dict.pop("password"))
+        user_dict["password_hash"] = await get_password_hash_async(user_dict.pop("password"))
         
         # Set profile data
         profile_data = {}
@@ -44,17 +91,21 @@ class AuthService:
         """Authenticate user and return user data if valid"""
         user = await self.collection.find_one({"email": login_data.email})
         if not user:
+            # Burn the same bcrypt cost as a real verification so timing
+            # doesn't leak whether the account exists
+            await verify_password_async(login_data.password, _DUMMY_PASSWORD_HASH)
             return None
-        
-        if not verify_password(login_data.password, user["password_hash"]):
+
+        if not await verify_password_async(login_data.password, user["password_hash"]):
             return None
         
-        # Update last login
-        await self.collection.update_one(
+        # Update last login in the background - the client shouldn't wait
+        # on a telemetry write
+        _spawn_background_task(self.collection.update_one(
             {"_id": user["_id"]},
-            {"$set": {"last_login": datetime.utcnow()}}
-        )
-        
+            {"$currentDate": {"last_login": True}}
+        ))
+
         return UserResponse.from_dict(user)
 
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
@@ -84,39 +135,81 @@ class AuthService:
     async def update_user_profile(self, user_id: str, profile_data: dict) -> Optional[UserResponse]:
         """Update user profile"""
         try:
-            # Update user profile
-            update_data = {}
-            for key, value in profile_data.items():
-                if key in ["first_name", "last_name", "avatar_url", "bio"]:
-                    update_data[f"profile.{key}"] = value
-                elif key in ["theme", "notifications"]:
-                    update_data[f"preferences.{key}"] = value
-            
-            if update_data:
-                # Try with string UUID first
-                result = await self.collection.update_one(
-                    {"_id": user_id},
-                    {"$set": update_data}
+            # Build the update mask from the allowed keys only
+            update_data = {
+                (f"profile.{key}" if key in _PROFILE_KEYS else f"preferences.{key}"): value
+                for key, value in profile_data.items()
+                if key in _PROFILE_KEYS or key in _PREFERENCE_KEYS
+            }
+
+            if not update_data:
+                return await self.get_user_by_id(user_id)
+
+            # Update and read back in a single round trip
+            # Try with string UUID first
+            updated_user = await self.collection.find_one_and_update(
+                {"_id": user_id},
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
+            )
+
+            # If no document matched, try with ObjectId
+            if updated_user is None:
+                from bson import ObjectId
+                updated_user = await self.collection.find_one_and_update(
+                    {"_id": ObjectId(user_id)},
+                    {"$set": update_data},
+                    return_document=ReturnDocument.AFTER
                 )
-                
-                # If no document updated, try with ObjectId
-                if result.modified_count == 0:
-                    from bson import ObjectId
-                    await self.collection.update_one(
-                        {"_id": ObjectId(user_id)},
-                        {"$set": update_data}
-                    )
-            
-            # Return updated user
-            return await self.get_user_by_id(user_id)
+
+            if updated_user is None:
+                return None
+
+            # Cached sessions hold the old profile - drop them
+            self.invalidate_user_sessions(user_id)
+
+            return UserResponse.from_dict(updated_user)
         except Exception:
             return None
 
     async def create_access_token_for_user(self, user: UserResponse) -> str:
         """Create access token for user"""
+        jti = str(uuid.uuid4())
         token_data = {
             "sub": user.email,
             "user_id": user.id,
-            "role": user.role
+            "role": user.role,
+            "jti": jti
         }
-        return create_access_token(token_data)
\ No newline at end of file
+        self._cache_session(jti, user)
+        return create_access_token(token_data)
+
+    async def get_user_from_token_payload(self, payload: dict) -> Optional[UserResponse]:
+        """Resolve a verified token payload to a user, using the session cache"""
+        jti = payload.get("jti")
+        if jti:
+            cached = _session_cache.get(jti)
+            if cached:
+                if cached[0] > time.monotonic():
+                    _session_cache.move_to_end(jti)
+                    return cached[1]
+                # Expired - the jti never comes back, so drop it now
+                _drop_session(jti, cached[1].id)
+
+        user = await self.get_user_by_id(payload.get("user_id"))
+        if user and jti:
+            self._cache_session(jti, user)
+        return user
+
+    def invalidate_user_sessions(self, user_id: str):
+        """Drop all cached sessions for a user (e.g. after a profile change)"""
+        for jti in _user_sessions.pop(user_id, set()):
+            _session_cache.pop(jti, None)
+
+    def _cache_session(self, jti: str, user: UserResponse):
+        _session_cache[jti] = (time.monotonic() + _SESSION_TTL_SECONDS, user)
+        _session_cache.move_to_end(jti)
+        _user_sessions.setdefault(user.id, set()).add(jti)
+        while len(_session_cache) > _SESSION_CACHE_MAX:
+            old_jti, (_, old_user) = _session_cache.popitem(last=False)
+            _drop_session(old_jti, old_user.id)
\ No newline at end of file
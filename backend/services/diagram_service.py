@@ -4,6 +4,79 @@ from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
 from utils.database import convert_doc_to_dict, convert_docs_to_list
+import asyncio
+
+# Version writes are history records, not user-facing state, so they are
+# queued here and flushed in batches off the request path
+_version_queue = None
+_version_flusher_task = None
+_VERSION_FLUSH_BATCH = 100
+_VERSION_FLUSH_INTERVAL = 0.2  # seconds
+
+
+def start_version_flusher(db: AsyncIOMotorDatabase):
+    """Start the background task that drains queued diagram versions"""
+    global _version_queue, _version_flusher_task
+    if _version_flusher_task is None or _version_flusher_task.done():
+        _version_queue = asyncio.Queue()
+        _version_flusher_task = asyncio.create_task(_drain_version_queue(db))
+
+
+async def stop_version_flusher():
+    """Stop the flusher, writing out anything still queued"""
+    global _version_queue, _version_flusher_task
+    if _version_flusher_task is not None:
+        _version_flusher_task.cancel()
+        try:
+            await _version_flusher_task
+        except asyncio.CancelledError:
+            pass
+        _version_flusher_task = None
+        _version_queue = None
+
+
+async def _drain_version_queue(db: AsyncIOMotorDatabase):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            batch = [await _version_queue.get()]
+            deadline = loop.time() + _VERSION_FLUSH_INTERVAL
+
+            # Collect more documents until the batch fills or the interval passes
+            while len(batch) < _VERSION_FLUSH_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_version_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await _flush_version_batch(db, batch)
+    except asyncio.CancelledError:
+        # Shutdown - write out whatever is still queued
+        batch = []
+        while not _version_queue.empty():
+            batch.append(_version_queue.get_nowait())
+        if batch:
+            await _flush_version_batch(db, batch)
+        raise
+
+
+async def _flush_version_batch(db: AsyncIOMotorDatabase, batch: list):
+    try:
+        await db.diagram_versions.insert_many(batch, ordered=False)
+    except Exception as e:
+        print(f"❌ Failed to flush {len(batch)} diagram versions: {e}")
+
+
+def _as_object_id(diagram_id) -> Optional[ObjectId]:
+    """Parse a diagram id once, accepting already-parsed ObjectIds"""
+    if isinstance(diagram_id, ObjectId):
+        return diagram_id
+    if not ObjectId.is_valid(diagram_id):
+        return None
+    return ObjectId(diagram_id)
 
 
 class DiagramService:
@@ -45,93 +118,114 @@ class DiagramService:
 
     async def get_diagram_by_id(self, diagram_id: str) -> Optional[DiagramResponse]:
         """Get diagram by ID"""
-        try:
-            diagram = await self.collection.find_one({"_id": ObjectId(diagram_id)})
-            if diagram:
-                diagram = convert_doc_to_dict(diagram)
-                return DiagramResponse(**diagram)
-        except Exception:
-            pass
-        return None
+        oid = _as_object_id(diagram_id)
+        if oid is None:
+            return None
+
+        diagram = await self.collection.find_one({"_id": oid})
+        if diagram is None:
+            return None
+
+        return DiagramResponse(**convert_doc_to_dict(diagram))
 
     async def update_diagram(self, diagram_id: str, diagram_data: DiagramUpdate) -> Optional[DiagramResponse]:
         """Update diagram"""
-        try:
-            update_data = {}
-            
-            # Only update provided fields
-            if diagram_data.title is not None:
-                update_data["title"] = diagram_data.title
-            
-            if diagram_data.diagram_data is not None:
-                update_data["diagram_data"] = diagram_data.diagram_data.dict()
-            
-            if diagram_data.metadata is not None:
-                update_data["metadata"] = diagram_data.metadata.dict()
-            
-            update_data["updated_at"] = datetime.utcnow()
-            update_data["version"] = {"$inc": 1}  # Increment version
-            
-            if update_data:
-                result = await self.collection.update_one(
-                    {"_id": ObjectId(diagram_id)},
-                    {"$set": update_data, "$inc": {"version": 1}}
-                )
-                
-                if result.modified_count:
-                    updated_diagram = await self.collection.find_one({"_id": ObjectId(diagram_id)})
-                    return DiagramResponse(**updated_diagram)
-        except Exception:
-            pass
-        return None
+        oid = _as_object_id(diagram_id)
+        if oid is None:
+            return None
+
+        update_data = {}
+
+        # Only update provided fields
+        if diagram_data.title is not None:
+            update_data["title"] = diagram_data.title
+
+        if diagram_data.diagram_data is not None:
+            update_data["diagram_data"] = diagram_data.diagram_data.dict()
+
+        if diagram_data.metadata is not None:
+            update_data["metadata"] = diagram_data.metadata.dict()
+
+        update_data["updated_at"] = datetime.utcnow()
+
+        result = await self.collection.update_one(
+            {"_id": oid},
+            {"$set": update_data, "$inc": {"version": 1}}
+        )
+
+        if not result.modified_count:
+            return None
+
+        updated_diagram = await self.collection.find_one({"_id": oid})
+        if updated_diagram is None:
+            return None
+
+        return DiagramResponse(**convert_doc_to_dict(updated_diagram))
 
     async def delete_diagram(self, diagram_id: str) -> bool:
         """Delete diagram"""
-        try:
-            result = await self.collection.delete_one({"_id": ObjectId(diagram_id)})
-            return result.deleted_count > 0
-        except Exception:
+        oid = _as_object_id(diagram_id)
+        if oid is None:
             return False
 
+        result = await self.collection.delete_one({"_id": oid})
+        return result.deleted_count > 0
+
     async def submit_diagram(self, diagram_id: str) -> Optional[DiagramResponse]:
         """Submit diagram for scoring"""
-        try:
-            result = await self.collection.update_one(
-                {"_id": ObjectId(diagram_id)},
-                {"$set": {"status": "submitted", "updated_at": datetime.utcnow()}}
-            )
-            
-            if result.modified_count:
-                submitted_diagram = await self.collection.find_one({"_id": ObjectId(diagram_id)})
-                return DiagramResponse(**submitted_diagram)
-        except Exception:
-            pass
-        return None
+        oid = _as_object_id(diagram_id)
+        if oid is None:
+            return None
+
+        result = await self.collection.update_one(
+            {"_id": oid},
+            {"$set": {"status": "submitted", "updated_at": datetime.utcnow()}}
+        )
+
+        if not result.modified_count:
+            return None
+
+        submitted_diagram = await self.collection.find_one({"_id": oid})
+        if submitted_diagram is None:
+            return None
+
+        return DiagramResponse(**convert_doc_to_dict(submitted_diagram))
 
     async def duplicate_diagram(self, diagram_id: str, new_user_id: str) -> Optional[DiagramResponse]:
         """Duplicate an existing diagram"""
-        try:
-            original_diagram = await self.collection.find_one({"_id": ObjectId(diagram_id)})
-            if not original_diagram:
-                return None
-            
-            # Create new diagram data
-            new_diagram = DiagramInDB(
-                user_id=new_user_id,
-                scenario_id=original_diagram.get("scenario_id"),
-                title=f"{original_diagram['title']} (Copy)",
-                diagram_data=original_diagram["diagram_data"],
-                metadata=original_diagram["metadata"],
-                status="draft"
-            )
-            
-            result = await self.collection.insert_one(new_diagram.dict(by_alias=True))
-            duplicated_diagram = await self.collection.find_one({"_id": result.inserted_id})
-            
-            return DiagramResponse(**duplicated_diagram)
-        except Exception:
-            pass
-        return None
+        oid = _as_object_id(diagram_id)
+        if oid is None:
+            return None
+
+        # Copy server-side so the (potentially large) diagram_data blob never
+        # travels over the wire. The new _id is generated here so the copy
+        # can be read back directly afterwards.
+        new_id = ObjectId()
+        now = datetime.utcnow()
+        pipeline = [
+            {"$match": {"_id": oid}},
+            {"$project": {
+                "_id": {"$literal": new_id},
+                "user_id": {"$literal": new_user_id},
+                "scenario_id": {"$ifNull": ["$scenario_id", None]},
+                "title": {"$concat": ["$title", " (Copy)"]},
+                "diagram_data": 1,
+                "metadata": 1,
+                "status": {"$literal": "draft"},
+                "created_at": {"$literal": now},
+                "updated_at": {"$literal": now},
+                "version": {"$literal": 1}
+            }},
+            {"$merge": {"into": "diagrams"}}
+        ]
+        await self.collection.aggregate(pipeline).to_list(length=None)
+
+        duplicated_diagram = await self.collection.find_one({"_id": new_id})
+        if duplicated_diagram is None:
+            # Source diagram didn't exist, so nothing was copied
+            return None
+
+        return DiagramResponse(**convert_doc_to_dict(duplicated_diagram))
 
     async def get_diagram_collaborators(self, diagram_id: str) -> List[str]:
         """Get list of users collaborating on a diagram"""
@@ -141,23 +235,27 @@ class DiagramService:
 
     async def save_diagram_version(self, diagram_id: str, version_data: dict) -> bool:
         """Save a version of the diagram for history"""
-        try:
-            versions_collection = self.db.diagram_versions
-            
-            diagram = await self.collection.find_one({"_id": ObjectId(diagram_id)})
-            if not diagram:
-                return False
-            
-            version_doc = {
-                "diagram_id": diagram_id,
-                "version": diagram["version"],
-                "diagram_data": diagram["diagram_data"],
-                "metadata": diagram["metadata"],
-                "created_at": datetime.utcnow(),
-                "created_by": diagram["user_id"]
-            }
-            
-            await versions_collection.insert_one(version_doc)
-            return True
-        except Exception:
-            return False
\ No newline at end of file
+        oid = _as_object_id(diagram_id)
+        if oid is None:
+            return False
+
+        diagram = await self.collection.find_one({"_id": oid})
+        if diagram is None:
+            return False
+
+        version_doc = {
+            "diagram_id": str(oid),
+            "version": diagram["version"],
+            "diagram_data": diagram["diagram_data"],
+            "metadata": diagram["metadata"],
+            "created_at": datetime.utcnow(),
+            "created_by": diagram["user_id"]
+        }
+
+        # Queue the write for the batch flusher when it's running; fall back
+        # to a direct insert otherwise (scripts, tests)
+        if _version_queue is not None:
+            await _version_queue.put(version_doc)
+        else:
+            await self.db.diagram_versions.insert_one(version_doc)
+        return True
\ No newline at end of file
@@ -3,6 +3,171 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from bson import ObjectId
 from utils.database import convert_doc_to_dict, convert_docs_to_list
+from pymongo import UpdateOne
+import asyncio
+import time
+import numpy as np
+
+# The achievement catalog is static, so it lives at module scope instead of
+# being rebuilt on every call
+_AVAILABLE_ACHIEVEMENTS = (
+    {"badge_id": "first_score", "name": "First Steps", "description": "Complete your first scenario", "icon": "🎯"},
+    {"badge_id": "high_scorer", "name": "High Scorer", "description": "Achieve a score of 90 or higher", "icon": "🏆"},
+    {"badge_id": "consistent_performer", "name": "Consistent Performer", "description": "Maintain good scores across 5 scenarios", "icon": "📈"},
+    {"badge_id": "security_expert", "name": "Security Expert", "description": "Consistently high security scores", "icon": "🔒"},
+    {"badge_id": "architecture_master", "name": "Architecture Master", "description": "Excel at system architecture", "icon": "🏗️"},
+    {"badge_id": "speed_demon", "name": "Speed Demon", "description": "Complete scenarios quickly", "icon": "⚡"},
+    {"badge_id": "perfectionist", "name": "Perfectionist", "description": "Achieve perfect scores", "icon": "💯"}
+)
+
+# Seed catalog for first boot; _create_default_learning_paths stamps
+# created_at when it inserts these
+_DEFAULT_PATHS = (
+    {
+        "name": "Security Fundamentals",
+        "description": "Learn the basics of cybersecurity and threat modeling",
+        "category": "security",
+        "difficulty": "beginner",
+        "modules": [
+            {"name": "Introduction to Security", "scenarios": ["basic_web_security"]},
+            {"name": "Authentication & Authorization", "scenarios": ["auth_design"]},
+            {"name": "Data Protection", "scenarios": ["data_encryption"]}
+        ],
+        "estimated_hours": 10,
+        "active": True
+    },
+    {
+        "name": "Web Application Security",
+        "description": "Deep dive into web application security patterns",
+        "category": "web",
+        "difficulty": "intermediate",
+        "modules": [
+            {"name": "Frontend Security", "scenarios": ["spa_security"]},
+            {"name": "API Security", "scenarios": ["rest_api_security"]},
+            {"name": "Database Security", "scenarios": ["database_protection"]}
+        ],
+        "estimated_hours": 15,
+        "active": True
+    },
+    {
+        "name": "Cloud Security Architecture",
+        "description": "Master cloud security and architecture patterns",
+        "category": "cloud",
+        "difficulty": "expert",
+        "modules": [
+            {"name": "Cloud Fundamentals", "scenarios": ["cloud_basics"]},
+            {"name": "Microservices Security", "scenarios": ["microservices_arch"]},
+            {"name": "DevSecOps", "scenarios": ["devsecops_pipeline"]}
+        ],
+        "estimated_hours": 20,
+        "active": True
+    }
+)
+
+# The path catalog changes on the order of hours, so list reads are served
+# from a short-lived in-process cache keyed by category
+_paths_cache = {}
+_PATHS_CACHE_TTL = 300  # seconds
+
+# Strong references to in-flight loader batches so they aren't garbage
+# collected mid-query
+_loader_tasks = set()
+
+# Ceiling on score docs materialized per user in one read
+_MAX_SCORE_DOCS = 500
+
+# Badges check_and_award_achievements can hand out
+_AWARDABLE_BADGES = frozenset({
+    "first_score", "high_scorer", "consistent_performer", "security_expert"
+})
+
+_WEAK_AREA_LABELS = ("Security", "Architecture", "Performance", "Completeness")
+
+
+def _weak_areas_from_docs(user_scores: List[Dict[str, Any]]) -> List[str]:
+    """Client-side counterpart to _identify_weak_areas_agg
+
+    For callers that already hold score docs in memory (batch jobs,
+    loader results); one vectorized mean replaces four Python passes.
+    """
+    if not user_scores:
+        return []
+
+    arr = np.fromiter(
+        (value
+         for s in user_scores
+         for value in (s["scores"]["security_score"], s["scores"]["architecture_score"],
+                       s["scores"]["performance_score"], s["scores"]["completeness_score"])),
+        dtype=np.float32, count=len(user_scores) * 4
+    ).reshape(-1, 4)
+
+    weak_mask = arr.mean(axis=0) < 70  # below 70 is weak
+    return [label for label, weak in zip(_WEAK_AREA_LABELS, weak_mask) if weak]
+
+
+class ScoresLoader:
+    """Coalesce concurrent per-user score fetches into one $in query
+
+    Loads requested in the same event-loop tick share a single
+    find({"user_id": {"$in": [...]}}) round trip and are demultiplexed
+    back onto per-user futures, DataLoader style.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._scheduled = False
+
+    async def load(self, user_id: str) -> List[Dict[str, Any]]:
+        future = self._pending.get(user_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[user_id] = future
+            if not self._scheduled:
+                self._scheduled = True
+                asyncio.get_running_loop().call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        if not pending:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+        _loader_tasks.add(task)
+        task.add_done_callback(_loader_tasks.discard)
+
+    async def _run_batch(self, pending: Dict[str, asyncio.Future]):
+        try:
+            docs = await self.db.scores.find(
+                {"user_id": {"$in": list(pending)}}, {"user_id": 1, "scores": 1}
+            ).to_list(length=_MAX_SCORE_DOCS * len(pending))
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        docs_by_user = {}
+        for doc in docs:
+            docs_by_user.setdefault(doc["user_id"], []).append(doc)
+
+        for user_id, future in pending.items():
+            if not future.done():
+                future.set_result(docs_by_user.get(user_id, []))
+
+
+# Shared across service instances - routers build a fresh LearningService
+# per request, and batching only helps if concurrent requests coalesce
+_scores_loader = None
+
+
+def _get_scores_loader(db: AsyncIOMotorDatabase) -> ScoresLoader:
+    global _scores_loader
+    if _scores_loader is None:
+        _scores_loader = ScoresLoader(db)
+    return _scores_loader
 
 
 class LearningService:
@@ -11,21 +176,46 @@ class LearningService:
         self.learning_paths_collection = db.learning_paths
         self.user_progress_collection = db.user_learning_progress
         self.achievements_collection = db.achievements
+        self.scores_loader = _get_scores_loader(db)
+
+    async def ensure_indexes(self):
+        """Create the indexes backing this service's hot query shapes"""
+        await asyncio.gather(
+            self.db.scores.create_index([("user_id", 1), ("submission_time", -1)]),
+            self.user_progress_collection.create_index(
+                [("user_id", 1), ("path_id", 1)], unique=True
+            ),
+            self.achievements_collection.create_index([("user_id", 1), ("earned_at", -1)]),
+            self.achievements_collection.create_index([("user_id", 1), ("badge_id", 1)]),
+            self.learning_paths_collection.create_index([("active", 1), ("category", 1)])
+        )
 
     async def get_learning_paths(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get available learning paths"""
+        now = time.monotonic()
+        cached = _paths_cache.get(category)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
         query = {"active": True}
         if category:
             query["category"] = category
-        
+
         paths = await self.learning_paths_collection.find(query).to_list(length=None)
-        
+
         # Default learning paths if none exist
         if not paths:
             return await self._create_default_learning_paths()
-        
+
         # Convert ObjectIds to strings
-        return convert_docs_to_list(paths)
+        paths = convert_docs_to_list(paths)
+        _paths_cache[category] = (now + _PATHS_CACHE_TTL, paths)
+        return paths
+
+    @staticmethod
+    def invalidate_paths_cache():
+        """Drop cached path listings (call after path edits)"""
+        _paths_cache.clear()
 
     async def get_learning_path_by_id(self, path_id: str) -> Optional[Dict[str, Any]]:
         """Get learning path details"""
@@ -38,24 +228,24 @@ class LearningService:
     async def enroll_user_in_path(self, user_id: str, path_id: str) -> bool:
         """Enroll user in a learning path"""
         try:
-            # Check if already enrolled
-            existing = await self.user_progress_collection.find_one({
-                "user_id": user_id,
-                "path_id": path_id
-            })
-            
+            # Check if already enrolled - only the _id is needed
+            existing = await self.user_progress_collection.find_one(
+                {"user_id": user_id, "path_id": path_id}, {"_id": 1}
+            )
+
             if existing:
                 return True  # Already enrolled
             
             # Create progress record
+            now = datetime.utcnow()
             progress_doc = {
                 "user_id": user_id,
                 "path_id": path_id,
-                "enrolled_at": datetime.utcnow(),
+                "enrolled_at": now,
                 "current_module": 0,
                 "completed_modules": [],
                 "completion_percentage": 0.0,
-                "last_activity": datetime.utcnow()
+                "last_activity": now
             }
             
             await self.user_progress_collection.insert_one(progress_doc)
@@ -65,53 +255,59 @@ class LearningService:
 
     async def get_user_progress(self, user_id: str) -> Dict[str, Any]:
         """Get user's learning progress"""
-        # Get all enrolled paths
-        enrolled_paths = await self.user_progress_collection.find({
-            "user_id": user_id
-        }).to_list(length=None)
-        
+        # Join enrollments to their paths server-side - one round trip for
+        # the whole progress view
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$addFields": {"pid": {"$toObjectId": "$path_id"}}},
+            {"$lookup": {
+                "from": "learning_paths",
+                "localField": "pid",
+                "foreignField": "_id",
+                "as": "path"
+            }},
+            {"$unwind": "$path"},
+            {"$project": {
+                "_id": 0,
+                "path_id": 1,
+                "path_name": "$path.name",
+                "completion_percentage": 1,
+                "current_module": 1,
+                "last_activity": 1
+            }}
+        ]
+        enrolled_paths = await self.user_progress_collection.aggregate(pipeline).to_list(length=_MAX_SCORE_DOCS)
+
         progress_data = {
             "enrolled_paths": len(enrolled_paths),
             "active_paths": [],
             "completed_paths": [],
             "overall_progress": 0.0
         }
-        
+
         total_progress = 0.0
-        for path_progress in enrolled_paths:
-            path = await self.learning_paths_collection.find_one({
-                "_id": ObjectId(path_progress["path_id"])
-            })
-            
-            if path:
-                path_data = {
-                    "path_id": path_progress["path_id"],
-                    "path_name": path["name"],
-                    "completion_percentage": path_progress["completion_percentage"],
-                    "current_module": path_progress["current_module"],
-                    "last_activity": path_progress["last_activity"]
-                }
-                
-                if path_progress["completion_percentage"] >= 100:
-                    progress_data["completed_paths"].append(path_data)
-                else:
-                    progress_data["active_paths"].append(path_data)
-                
-                total_progress += path_progress["completion_percentage"]
-        
+        for path_data in enrolled_paths:
+            if path_data["completion_percentage"] >= 100:
+                progress_data["completed_paths"].append(path_data)
+            else:
+                progress_data["active_paths"].append(path_data)
+
+            total_progress += path_data["completion_percentage"]
+
         if enrolled_paths:
             progress_data["overall_progress"] = total_progress / len(enrolled_paths)
-        
+
         return progress_data
 
     async def get_personalized_recommendations(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get personalized learning recommendations"""
-        # Get user's score history to identify weak areas
-        user_scores = await self.db.scores.find({"user_id": user_id}).to_list(length=None)
-        
+        # Averages come back from a server-side $group; None means the user
+        # has no scored scenarios yet
+        weak_areas = await self._identify_weak_areas_agg(user_id)
+
         recommendations = []
-        
-        if not user_scores:
+
+        if weak_areas is None:
             # New user recommendations
             recommendations = [
                 {
@@ -131,9 +327,7 @@ class LearningService:
                 }
             ]
         else:
-            # Analyze performance to recommend improvements
-            weak_areas = await self._identify_user_weak_areas(user_scores)
-            
+            # Recommend improvements for the weak areas
             for area in weak_areas[:limit]:
                 recommendations.append({
                     "type": "scenario",
@@ -146,160 +340,186 @@ class LearningService:
         
         return recommendations
 
-    async def get_user_achievements(self, user_id: str) -> Dict[str, Any]:
+    async def _load_user_scores(self, user_id: str,
+                                cache: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch a user's score docs, memoized per request
+
+        Methods handling the same request can share one cache dict so the
+        collection is only read the first time.
+        """
+        if cache is not None and user_id in cache:
+            return cache[user_id]
+
+        scores = await self.scores_loader.load(user_id)
+
+        if cache is not None:
+            cache[user_id] = scores
+        return scores
+
+    async def get_user_achievements(self, user_id: str,
+                                    scores_cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get user achievements and badges"""
-        # Get user's achievements
-        user_achievements = await self.achievements_collection.find({
-            "user_id": user_id
-        }).to_list(length=None)
-        
+        # One $facet read returns the earned-badge ids and the five most
+        # recent achievements, with the sort+limit done server-side; the
+        # score history is an independent read gathered alongside it
+        achievements_pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$facet": {
+                "all": [{"$project": {"_id": 0, "badge_id": 1}}],
+                "recent": [
+                    {"$sort": {"earned_at": -1}},
+                    {"$limit": 5},
+                    {"$project": {"_id": 0}}
+                ]
+            }}
+        ]
+        facet_results, user_scores = await asyncio.gather(
+            self.achievements_collection.aggregate(achievements_pipeline).to_list(length=1),
+            self._load_user_scores(user_id, scores_cache)
+        )
+        facets = facet_results[0] if facet_results else {"all": [], "recent": []}
+
         # Get available achievements
-        available_achievements = await self._get_available_achievements()
-        
-        earned_badges = [ach["badge_id"] for ach in user_achievements]
-        
+        available_achievements = self._get_available_achievements()
+
+        earned_badges = [doc["badge_id"] for doc in facets["all"]]
+
         return {
             "earned_badges": earned_badges,
             "total_earned": len(earned_badges),
             "available_achievements": available_achievements,
-            "recent_achievements": sorted(user_achievements, key=lambda x: x["earned_at"], reverse=True)[:5],
-            "progress_to_next": await self._calculate_progress_to_next_badge(user_id, earned_badges)
+            "recent_achievements": facets["recent"],
+            "progress_to_next": self._calculate_progress_to_next_badge(earned_badges, user_scores)
         }
 
-    async def check_and_award_achievements(self, user_id: str) -> List[Dict[str, Any]]:
+    async def check_and_award_achievements(self, user_id: str,
+                                           scores_cache: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Check for new achievements and award them"""
-        # Get user stats
-        user_scores = await self.db.scores.find({"user_id": user_id}).to_list(length=None)
-        existing_achievements = await self.achievements_collection.find({
-            "user_id": user_id
-        }).to_list(length=None)
-        
+        # The earned-badge read is the cheap one, so it gates everything:
+        # when no awardable badge is left, the trigger aggregation is
+        # skipped entirely
+        existing_achievements = await self.achievements_collection.find(
+            {"user_id": user_id}
+        ).to_list(length=_MAX_SCORE_DOCS)
         existing_badge_ids = {ach["badge_id"] for ach in existing_achievements}
+
+        if existing_badge_ids.issuperset(_AWARDABLE_BADGES):
+            return []
+
+        # Everything the checks need reduces to four scalars, so compute
+        # them server-side in one $facet instead of pulling the history
+        trigger_pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "high": [{"$match": {"scores.total_score": {"$gte": 90}}}, {"$count": "n"}],
+                "last5": [
+                    {"$sort": {"submission_time": -1}},
+                    {"$limit": 5},
+                    {"$project": {"_id": 0, "ok": {"$gte": ["$scores.total_score", 70]}}}
+                ],
+                "security": [{"$match": {"scores.security_score": {"$gte": 85}}}, {"$count": "n"}]
+            }}
+        ]
+        facet_results = await self.db.scores.aggregate(trigger_pipeline).to_list(length=1)
+        facets = facet_results[0]
+        total_count = facets["total"][0]["n"] if facets["total"] else 0
+        high_count = facets["high"][0]["n"] if facets["high"] else 0
+        security_count = facets["security"][0]["n"] if facets["security"] else 0
+        last5 = facets["last5"]
+
         new_achievements = []
-        
-        # Check various achievement criteria
-        
+
+        # Check the remaining criteria, earned-badge test first so the
+        # predicate work short-circuits
+
         # First Score Achievement
-        if len(user_scores) >= 1 and "first_score" not in existing_badge_ids:
-            await self._award_achievement(user_id, "first_score", "First Steps", "Completed your first scenario")
-            new_achievements.append({"badge_id": "first_score", "name": "First Steps"})
-        
+        if "first_score" not in existing_badge_ids and total_count >= 1:
+            new_achievements.append({"badge_id": "first_score", "name": "First Steps",
+                                     "description": "Completed your first scenario"})
+
         # High Score Achievement
-        high_scores = [s for s in user_scores if s["scores"]["total_score"] >= 90]
-        if len(high_scores) >= 1 and "high_scorer" not in existing_badge_ids:
-            await self._award_achievement(user_id, "high_scorer", "High Scorer", "Achieved a score of 90 or higher")
-            new_achievements.append({"badge_id": "high_scorer", "name": "High Scorer"})
-        
+        if "high_scorer" not in existing_badge_ids and high_count >= 1:
+            new_achievements.append({"badge_id": "high_scorer", "name": "High Scorer",
+                                     "description": "Achieved a score of 90 or higher"})
+
         # Consistent Performer
-        if len(user_scores) >= 5:
-            recent_scores = [s["scores"]["total_score"] for s in user_scores[-5:]]
-            if all(score >= 70 for score in recent_scores) and "consistent_performer" not in existing_badge_ids:
-                await self._award_achievement(user_id, "consistent_performer", "Consistent Performer", "Maintained good scores across 5 scenarios")
-                new_achievements.append({"badge_id": "consistent_performer", "name": "Consistent Performer"})
-        
+        if ("consistent_performer" not in existing_badge_ids and total_count >= 5
+                and all(doc["ok"] for doc in last5)):
+            new_achievements.append({"badge_id": "consistent_performer", "name": "Consistent Performer",
+                                     "description": "Maintained good scores across 5 scenarios"})
+
         # Security Expert
-        security_scores = [s["scores"]["security_score"] for s in user_scores if s["scores"]["security_score"] >= 85]
-        if len(security_scores) >= 3 and "security_expert" not in existing_badge_ids:
-            await self._award_achievement(user_id, "security_expert", "Security Expert", "Consistently high security scores")
-            new_achievements.append({"badge_id": "security_expert", "name": "Security Expert"})
-        
+        if "security_expert" not in existing_badge_ids and security_count >= 3:
+            new_achievements.append({"badge_id": "security_expert", "name": "Security Expert",
+                                     "description": "Consistently high security scores"})
+
+        # Persist the whole batch in one insert plus one user update
+        await self._award_achievements(user_id, new_achievements)
+
         return new_achievements
 
     # Private helper methods
     async def _create_default_learning_paths(self) -> List[Dict[str, Any]]:
         """Create default learning paths"""
-        default_paths = [
-            {
-                "name": "Security Fundamentals",
-                "description": "Learn the basics of cybersecurity and threat modeling",
-                "category": "security",
-                "difficulty": "beginner",
-                "modules": [
-                    {"name": "Introduction to Security", "scenarios": ["basic_web_security"]},
-                    {"name": "Authentication & Authorization", "scenarios": ["auth_design"]},
-                    {"name": "Data Protection", "scenarios": ["data_encryption"]}
-                ],
-                "estimated_hours": 10,
-                "active": True,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Web Application Security",
-                "description": "Deep dive into web application security patterns",
-                "category": "web",
-                "difficulty": "intermediate",
-                "modules": [
-                    {"name": "Frontend Security", "scenarios": ["spa_security"]},
-                    {"name": "API Security", "scenarios": ["rest_api_security"]},
-                    {"name": "Database Security", "scenarios": ["database_protection"]}
-                ],
-                "estimated_hours": 15,
-                "active": True,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Cloud Security Architecture",
-                "description": "Master cloud security and architecture patterns",
-                "category": "cloud",
-                "difficulty": "expert",
-                "modules": [
-                    {"name": "Cloud Fundamentals", "scenarios": ["cloud_basics"]},
-                    {"name": "Microservices Security", "scenarios": ["microservices_arch"]},
-                    {"name": "DevSecOps", "scenarios": ["devsecops_pipeline"]}
-                ],
-                "estimated_hours": 20,
-                "active": True,
-                "created_at": datetime.utcnow()
-            }
+        now = datetime.utcnow()
+        default_paths = [dict(path, created_at=now) for path in _DEFAULT_PATHS]
+
+        # Upsert all defaults in one round trip; $setOnInsert keeps this
+        # idempotent when concurrent callers race to seed the catalog
+        ops = [
+            UpdateOne({"name": path["name"]}, {"$setOnInsert": path}, upsert=True)
+            for path in default_paths
         ]
-        
-        # Insert default paths
-        for path in default_paths:
-            await self.learning_paths_collection.insert_one(path)
-        
+        await self.learning_paths_collection.bulk_write(ops, ordered=False)
+
         return default_paths
 
-    async def _identify_user_weak_areas(self, user_scores: List[Dict[str, Any]]) -> List[str]:
-        """Identify areas where user needs improvement"""
-        if not user_scores:
-            return []
-        
-        # Calculate average scores by category
-        security_avg = sum(s["scores"]["security_score"] for s in user_scores) / len(user_scores)
-        architecture_avg = sum(s["scores"]["architecture_score"] for s in user_scores) / len(user_scores)
-        performance_avg = sum(s["scores"]["performance_score"] for s in user_scores) / len(user_scores)
-        completeness_avg = sum(s["scores"]["completeness_score"] for s in user_scores) / len(user_scores)
-        
+    async def _identify_weak_areas_agg(self, user_id: str) -> Optional[List[str]]:
+        """Identify areas where user needs improvement
+
+        The category averages are reduced server-side; only four floats come
+        back. Returns None when the user has no scores yet.
+        """
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": None,
+                "security_avg": {"$avg": "$scores.security_score"},
+                "architecture_avg": {"$avg": "$scores.architecture_score"},
+                "performance_avg": {"$avg": "$scores.performance_score"},
+                "completeness_avg": {"$avg": "$scores.completeness_score"}
+            }}
+        ]
+        results = await self.db.scores.aggregate(pipeline).to_list(length=1)
+
+        if not results:
+            return None
+
+        averages = results[0]
         weak_areas = []
         threshold = 70  # Consider below 70 as weak
-        
-        if security_avg < threshold:
+
+        if averages["security_avg"] < threshold:
             weak_areas.append("Security")
-        if architecture_avg < threshold:
+        if averages["architecture_avg"] < threshold:
             weak_areas.append("Architecture")
-        if performance_avg < threshold:
+        if averages["performance_avg"] < threshold:
             weak_areas.append("Performance")
-        if completeness_avg < threshold:
+        if averages["completeness_avg"] < threshold:
             weak_areas.append("Completeness")
-        
+
         return weak_areas
 
-    async def _get_available_achievements(self) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _get_available_achievements() -> List[Dict[str, Any]]:
         """Get all available achievements"""
-        return [
-            {"badge_id": "first_score", "name": "First Steps", "description": "Complete your first scenario", "icon": "🎯"},
-            {"badge_id": "high_scorer", "name": "High Scorer", "description": "Achieve a score of 90 or higher", "icon": "🏆"},
-            {"badge_id": "consistent_performer", "name": "Consistent Performer", "description": "Maintain good scores across 5 scenarios", "icon": "📈"},
-            {"badge_id": "security_expert", "name": "Security Expert", "description": "Consistently high security scores", "icon": "🔒"},
-            {"badge_id": "architecture_master", "name": "Architecture Master", "description": "Excel at system architecture", "icon": "🏗️"},
-            {"badge_id": "speed_demon", "name": "Speed Demon", "description": "Complete scenarios quickly", "icon": "⚡"},
-            {"badge_id": "perfectionist", "name": "Perfectionist", "description": "Achieve perfect scores", "icon": "💯"}
-        ]
+        return [dict(achievement) for achievement in _AVAILABLE_ACHIEVEMENTS]
 
-    async def _calculate_progress_to_next_badge(self, user_id: str, earned_badges: List[str]) -> Dict[str, Any]:
+    @staticmethod
+    def _calculate_progress_to_next_badge(earned_badges: List[str],
+                                          user_scores: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate progress towards next achievement"""
-        user_scores = await self.db.scores.find({"user_id": user_id}).to_list(length=None)
-        
         if not user_scores:
             return {
                 "next_badge": "first_score",
@@ -336,20 +556,30 @@ class LearningService:
             "description": "All achievements unlocked!"
         }
 
-    async def _award_achievement(self, user_id: str, badge_id: str, name: str, description: str):
-        """Award an achievement to a user"""
-        achievement_doc = {
-            "user_id": user_id,
-            "badge_id": badge_id,
-            "name": name,
-            "description": description,
-            "earned_at": datetime.utcnow()
-        }
-        
-        await self.achievements_collection.insert_one(achievement_doc)
-        
-        # Also update user progress in users collection
-        await self.db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$addToSet": {"progress.badges": badge_id}}
+    async def _award_achievements(self, user_id: str, achievements: List[Dict[str, Any]]):
+        """Award a batch of achievements to a user"""
+        if not achievements:
+            return
+
+        earned_at = datetime.utcnow()
+        badge_ids = [ach["badge_id"] for ach in achievements]
+        achievement_docs = [
+            {
+                "user_id": user_id,
+                "badge_id": ach["badge_id"],
+                "name": ach["name"],
+                "description": ach.get("description", ""),
+                "earned_at": earned_at
+            }
+            for ach in achievements
+        ]
+
+        # The achievement insert and the users progress update don't depend
+        # on each other, so issue them concurrently
+        await asyncio.gather(
+            self.achievements_collection.insert_many(achievement_docs, ordered=False),
+            self.db.users.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$addToSet": {"progress.badges": {"$each": badge_ids}}}
+            )
         )
\ No newline at end of file
@@ -3,6 +3,17 @@ from models.scenario import ScenarioCreate, ScenarioResponse, ScenarioInDB, Scen
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
+
+# Exactly the fields ScenarioResponse reads, so lookups skip anything else
+# stored on the document
+_SCENARIO_PROJECTION = {
+    "title": 1, "description": 1, "category": 1, "difficulty": 1, "tags": 1,
+    "requirements": 1, "reference_architectures": 1, "scoring_criteria": 1,
+    "max_points": 1, "time_limit": 1, "prerequisites": 1,
+    "created_at": 1, "updated_at": 1, "published": 1
+}
 
 
 class ScenarioService:
@@ -10,15 +21,33 @@ class ScenarioService:
         self.db = db
         self.collection = db.scenarios
 
+    async def ensure_indexes(self):
+        """Create the indexes backing this service's hot query shapes"""
+        await asyncio.gather(
+            self.collection.create_index(
+                [("published", 1), ("category", 1), ("difficulty", 1), ("created_at", -1)]
+            ),
+            self.collection.create_index([("title", "text"), ("description", "text"), ("tags", "text")]),
+            self.db.scores.create_index(
+                [("user_id", 1), ("scenario_id", 1), ("submission_time", -1)]
+            )
+        )
+
     async def create_scenario(self, scenario_data: ScenarioCreate) -> ScenarioResponse:
         """Create a new scenario"""
         scenario_dict = scenario_data.dict()
         scenario_in_db = ScenarioInDB(**scenario_dict)
-        
-        result = await self.collection.insert_one(scenario_in_db.dict(by_alias=True))
-        created_scenario = await self.collection.find_one({"_id": result.inserted_id})
-        
-        return ScenarioResponse.from_dict(created_scenario)
+
+        # The inserted document is authoritative - build the response from
+        # it instead of reading the write back
+        doc = scenario_in_db.dict(by_alias=True)
+        if doc.get("_id") is None:
+            doc.pop("_id", None)  # let MongoDB assign the id
+
+        result = await self.collection.insert_one(doc)
+        doc["_id"] = result.inserted_id
+
+        return ScenarioResponse.from_dict(doc)
 
     async def get_scenarios(self, filters: ScenarioFilter, skip: int = 0, limit: int = 50) -> List[ScenarioResponse]:
         """Get scenarios with filtering"""
@@ -35,28 +64,33 @@ class ScenarioService:
             query["tags"] = {"$in": filters.tags}
         
         if filters.search:
-            query["$or"] = [
-                {"title": {"$regex": filters.search, "$options": "i"}},
-                {"description": {"$regex": filters.search, "$options": "i"}},
-                {"tags": {"$in": [filters.search]}}
-            ]
-        
-        cursor = self.collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        scenarios = await cursor.to_list(length=limit)
-        
-        return [ScenarioResponse.from_dict(scenario) for scenario in scenarios]
+            # The text index covers title/description/tags; an unanchored
+            # case-insensitive regex would scan the whole collection
+            query["$text"] = {"$search": filters.search}
+            cursor = self.collection.find(
+                query, {"score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit)
+        else:
+            cursor = self.collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
+
+        # Stream the cursor so each raw doc is released as soon as its
+        # response model is built, instead of holding both full lists
+        scenarios = []
+        async for scenario in cursor.batch_size(50):
+            scenarios.append(ScenarioResponse.from_dict(scenario))
+
+        return scenarios
 
     async def get_scenario_by_id(self, scenario_id: str) -> Optional[ScenarioResponse]:
         """Get scenario by ID"""
         try:
             # Try with string ID first (new format)
-            scenario = await self.collection.find_one({"_id": scenario_id})
+            scenario = await self.collection.find_one({"_id": scenario_id}, _SCENARIO_PROJECTION)
             if scenario:
                 return ScenarioResponse.from_dict(scenario)
-                
+
             # Fallback to ObjectId for backward compatibility
-            from bson import ObjectId
-            scenario = await self.collection.find_one({"_id": ObjectId(scenario_id)})
+            scenario = await self.collection.find_one({"_id": ObjectId(scenario_id)}, _SCENARIO_PROJECTION)
             if scenario:
                 return ScenarioResponse.from_dict(scenario)
         except Exception:
@@ -68,14 +102,15 @@ class ScenarioService:
         try:
             update_data = scenario_data.dict()
             update_data["updated_at"] = datetime.utcnow()
-            
-            result = await self.collection.update_one(
+
+            # Atomic update-and-return in one round trip
+            updated_scenario = await self.collection.find_one_and_update(
                 {"_id": ObjectId(scenario_id)},
-                {"$set": update_data}
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
             )
-            
-            if result.modified_count:
-                updated_scenario = await self.collection.find_one({"_id": ObjectId(scenario_id)})
+
+            if updated_scenario:
                 return ScenarioResponse.from_dict(updated_scenario)
         except Exception:
             pass
@@ -91,31 +126,31 @@ class ScenarioService:
 
     async def get_user_scenario_progress(self, user_id: str, scenario_id: str) -> dict:
         """Get user's progress on a specific scenario"""
-        # Get user's attempts and scores for this scenario
-        scores_collection = self.db.scores
-        diagrams_collection = self.db.diagrams
-        
-        # Get all attempts
-        attempts = await scores_collection.find({
-            "user_id": user_id,
-            "scenario_id": scenario_id
-        }).sort("submission_time", -1).to_list(length=None)
-        
-        # Get saved diagrams
-        saved_diagrams = await diagrams_collection.find({
-            "user_id": user_id,
-            "scenario_id": scenario_id
-        }).to_list(length=None)
-        
-        best_score = 0
-        if attempts:
-            best_score = max(attempt["scores"]["total_score"] for attempt in attempts)
-        
+        # The view only needs three scalars from the attempts plus a diagram
+        # count, so reduce server-side instead of pulling whole documents
+        attempts_pipeline = [
+            {"$match": {"user_id": user_id, "scenario_id": scenario_id}},
+            {"$group": {
+                "_id": None,
+                "attempts": {"$sum": 1},
+                "best_score": {"$max": "$scores.total_score"},
+                "last_attempt": {"$max": "$submission_time"}
+            }}
+        ]
+
+        agg_results, saved_diagrams = await asyncio.gather(
+            self.db.scores.aggregate(attempts_pipeline).to_list(length=1),
+            self.db.diagrams.count_documents({"user_id": user_id, "scenario_id": scenario_id})
+        )
+
+        stats = agg_results[0] if agg_results else {}
+        best_score = stats.get("best_score", 0) or 0
+
         return {
             "scenario_id": scenario_id,
-            "attempts": len(attempts),
+            "attempts": stats.get("attempts", 0),
             "best_score": best_score,
-            "saved_diagrams": len(saved_diagrams),
+            "saved_diagrams": saved_diagrams,
             "completed": best_score > 70,  # Consider 70+ as completed
-            "last_attempt": attempts[0]["submission_time"] if attempts else None
+            "last_attempt": stats.get("last_attempt")
         }
\ No newline at end of file
@@ -10,7 +10,94 @@ from services.validation_service import ThreatModelingValidationService
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from bson import ObjectId
-from utils.database import convert_doc_to_dict, convert_docs_to_list
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+from utils.database import convert_doc_to_dict
+
+# Scoring tables, hoisted so the per-call paths only do dict/tuple reads
+_SEVERITY_PTS = {"error": 20, "warning": 10, "info": 5}
+_SCORE_CATEGORIES = ("security", "architecture", "performance", "completeness")
+_SCORE_LEVELS = ((90, "Excellent"), (70, "Good"), (50, "Needs Improvement"), (0, "Poor"))
+
+# Validation is a pure function of the diagram content and scenario
+# context, so repeated scoring of an unchanged diagram (common during
+# iterative submissions) can reuse the previous result. Module-level
+# because services are constructed per request; LRU-bounded.
+_validation_cache: "OrderedDict[bytes, List[ValidationResult]]" = OrderedDict()
+_VALIDATION_CACHE_MAX = 1024
+
+# Score submissions burst during class sessions; concurrent inserts are
+# coalesced into insert_many batches by a background flusher. Each
+# submission awaits its own future, resolved with the assigned _id once
+# the batch carrying its document is written.
+_score_insert_queue = None
+_score_flusher_task = None
+_SCORE_FLUSH_BATCH = 100
+_SCORE_FLUSH_INTERVAL = 0.01  # seconds
+
+
+def start_score_flusher(db: AsyncIOMotorDatabase):
+    """Start the background task that batches queued score inserts"""
+    global _score_insert_queue, _score_flusher_task
+    if _score_flusher_task is None or _score_flusher_task.done():
+        _score_insert_queue = asyncio.Queue()
+        _score_flusher_task = asyncio.create_task(_drain_score_queue(db))
+
+
+async def stop_score_flusher():
+    """Stop the flusher, writing out anything still queued"""
+    global _score_insert_queue, _score_flusher_task
+    if _score_flusher_task is not None:
+        _score_flusher_task.cancel()
+        try:
+            await _score_flusher_task
+        except asyncio.CancelledError:
+            pass
+        _score_flusher_task = None
+        _score_insert_queue = None
+
+
+async def _drain_score_queue(db: AsyncIOMotorDatabase):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            batch = [await _score_insert_queue.get()]
+            deadline = loop.time() + _SCORE_FLUSH_INTERVAL
+
+            # Collect more submissions until the batch fills or the interval passes
+            while len(batch) < _SCORE_FLUSH_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_score_insert_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await _flush_score_batch(db, batch)
+    except asyncio.CancelledError:
+        # Shutdown - write out whatever is still queued
+        batch = []
+        while not _score_insert_queue.empty():
+            batch.append(_score_insert_queue.get_nowait())
+        if batch:
+            await _flush_score_batch(db, batch)
+        raise
+
+
+async def _flush_score_batch(db: AsyncIOMotorDatabase, batch: list):
+    docs = [doc for doc, _ in batch]
+    try:
+        result = await db.scores.insert_many(docs, ordered=False)
+        for (_, future), inserted_id in zip(batch, result.inserted_ids):
+            if not future.done():
+                future.set_result(inserted_id)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
 
 
 class ScoringService:
@@ -21,27 +108,108 @@ class ScoringService:
         self.scenario_service = ScenarioService(db)
         self.validation_service = ThreatModelingValidationService()
 
+    async def ensure_indexes(self):
+        """Create the indexes backing this service's hot query shapes"""
+        await asyncio.gather(
+            # History reads, stats/analytics matches and the streak query
+            # all filter on user_id and sort/filter on submission_time
+            self.collection.create_index([("user_id", 1), ("submission_time", -1)]),
+            # Leaderboard group-by-user over total scores
+            self.collection.create_index([("user_id", 1), ("scores.total_score", -1)]),
+            self.collection.create_index([("scenario_id", 1)]),
+            self.db.leaderboard_cache.create_index([("average_score", -1)])
+        )
+
+    async def refresh_leaderboard_cache(self) -> None:
+        """Materialize the all-time leaderboard into leaderboard_cache
+
+        Meant for a periodic (e.g. nightly) job. get_leaderboard serves
+        the unfiltered all-time view from this snapshot when present, so
+        the full group-by-user aggregation is amortized across reads.
+        """
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$user_id",
+                    "total_score": {"$sum": "$scores.total_score"},
+                    "scenarios_completed": {"$sum": 1},
+                    "average_score": {"$avg": "$scores.total_score"},
+                    "best_score": {"$max": "$scores.total_score"}
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "users",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "user"
+                }
+            },
+            {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+            {
+                "$project": {
+                    "total_score": 1,
+                    "scenarios_completed": 1,
+                    "average_score": 1,
+                    "best_score": 1,
+                    "user.profile.first_name": 1,
+                    "user.profile.last_name": 1,
+                    "user.email": 1
+                }
+            },
+            {"$merge": {
+                "into": "leaderboard_cache",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+
+        # $merge produces no output documents; draining the cursor runs it
+        await self.collection.aggregate(pipeline).to_list(length=None)
+
     async def validate_diagram(self, diagram_id: str, user_id: str) -> List[ValidationResult]:
         """Real-time diagram validation using enhanced validation service"""
         diagram = await self.diagram_service.get_diagram_by_id(diagram_id)
         if not diagram or diagram.user_id != user_id:
             raise ValueError("Diagram not found or access denied")
-        
+
         # Get scenario context for better validation
-        scenario_context = None
+        scenario = None
         if diagram.scenario_id:
             scenario = await self.scenario_service.get_scenario_by_id(diagram.scenario_id)
-            if scenario:
-                scenario_context = {
-                    "category": scenario.category,
-                    "difficulty": scenario.difficulty,
-                    "requirements": scenario.requirements.dict()
-                }
-        
-        # Use enhanced validation service
-        validation_results = await self.validation_service.validate_comprehensive(diagram, scenario_context)
-        
-        return validation_results
+
+        return await self._validate_with_context(diagram, scenario)
+
+    async def _validate_with_context(self, diagram: DiagramResponse,
+                                     scenario: Optional[Any]) -> List[ValidationResult]:
+        """Run comprehensive validation on an already-fetched diagram"""
+        scenario_context = None
+        if scenario:
+            scenario_context = {
+                "category": scenario.category,
+                "difficulty": scenario.difficulty,
+                "requirements": scenario.requirements.dict()
+            }
+
+        # The context is part of the key: the same diagram validates
+        # differently against different scenarios
+        cache_key = hashlib.blake2b(json.dumps(
+            {"diagram": diagram.diagram_data.dict(), "context": scenario_context},
+            sort_keys=True, default=str
+        ).encode()).digest()
+
+        cached = _validation_cache.get(cache_key)
+        if cached is not None:
+            _validation_cache.move_to_end(cache_key)
+            return list(cached)
+
+        results = await self.validation_service.validate_comprehensive(diagram, scenario_context)
+
+        _validation_cache[cache_key] = list(results)
+        if len(_validation_cache) > _VALIDATION_CACHE_MAX:
+            _validation_cache.popitem(last=False)
+
+        return results
 
     async def score_diagram(self, diagram_id: str, user_id: str, time_spent: int) -> Optional[ScoreResponse]:
         """Calculate final score for diagram"""
@@ -49,13 +217,14 @@ class ScoringService:
         if not diagram or diagram.user_id != user_id:
             raise ValueError("Diagram not found or access denied")
         
-        # Get scenario for scoring criteria
+        # Get scenario for scoring criteria; validation reuses the
+        # already-fetched diagram and scenario instead of reloading both
         scenario = None
         if diagram.scenario_id:
             scenario = await self.scenario_service.get_scenario_by_id(diagram.scenario_id)
-        
+
         # Run validation
-        validation_results = await self.validate_diagram(diagram_id, user_id)
+        validation_results = await self._validate_with_context(diagram, scenario)
         
         # Calculate scores
         scores = await self._calculate_scores(diagram, validation_results, scenario, time_spent)
@@ -74,10 +243,25 @@ class ScoringService:
             feedback=feedback
         )
         
-        result = await self.collection.insert_one(score_data.dict(by_alias=True))
-        created_score = await self.collection.find_one({"_id": result.inserted_id})
-        
-        return ScoreResponse(**created_score)
+        # The inserted document is authoritative - build the response from
+        # it instead of reading the write back
+        doc = score_data.dict(by_alias=True)
+        if doc.get("_id") is None:
+            doc.pop("_id", None)  # let MongoDB assign the id
+
+        # Queue the insert for the batch flusher when it's running; fall
+        # back to a direct write otherwise
+        if _score_insert_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            _score_insert_queue.put_nowait((doc, future))
+            inserted_id = await future
+        else:
+            result = await self.collection.insert_one(doc)
+            inserted_id = result.inserted_id
+
+        doc["_id"] = str(inserted_id)
+
+        return ScoreResponse(**doc)
 
     async def get_user_scores(self, user_id: str, scenario_id: Optional[str] = None, 
                              skip: int = 0, limit: int = 20) -> List[ScoreResponse]:
@@ -88,23 +272,50 @@ class ScoringService:
             query["scenario_id"] = scenario_id
         
         cursor = self.collection.find(query).skip(skip).limit(limit).sort("submission_time", -1)
-        scores = await cursor.to_list(length=limit)
-        
-        # Convert ObjectIds to strings
-        scores = convert_docs_to_list(scores)
-        return [ScoreResponse(**score) for score in scores]
+
+        # Stream the cursor so each raw doc is released as soon as its
+        # response model is built, instead of holding both full lists
+        scores = []
+        async for score in cursor.batch_size(50):
+            scores.append(ScoreResponse(**convert_doc_to_dict(score)))
+
+        return scores
 
     async def get_detailed_feedback(self, score_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed feedback for a score"""
         try:
-            score = await self.collection.find_one({
-                "_id": ObjectId(score_id),
-                "user_id": user_id
-            })
-            
-            if score:
+            # Single round-trip: fetch the score and join its scenario in
+            # one $facet so analysis hooks get both without a second query
+            pipeline = [
+                {"$match": {"_id": ObjectId(score_id), "user_id": user_id}},
+                {"$facet": {
+                    "score": [{"$limit": 1}],
+                    "scenario": [
+                        {"$lookup": {
+                            "from": "scenarios",
+                            "let": {"sid": "$scenario_id"},
+                            "pipeline": [
+                                {"$match": {"$expr": {"$eq": ["$_id", "$$sid"]}}},
+                                {"$project": {"title": 1, "category": 1, "difficulty": 1}}
+                            ],
+                            "as": "scenario"
+                        }},
+                        {"$unwind": "$scenario"},
+                        {"$replaceRoot": {"newRoot": "$scenario"}}
+                    ]
+                }}
+            ]
+
+            facets = await self.collection.aggregate(pipeline).to_list(length=1)
+            facet = facets[0] if facets else {}
+            score_docs = facet.get("score") or []
+
+            if score_docs:
+                score = convert_doc_to_dict(score_docs[0])
+                scenario_docs = facet.get("scenario") or []
                 return {
                     "score": ScoreResponse(**score),
+                    "scenario": convert_doc_to_dict(scenario_docs[0]) if scenario_docs else None,
                     "detailed_analysis": await self._get_detailed_analysis(score),
                     "improvement_suggestions": await self._get_improvement_suggestions(score)
                 }
@@ -115,33 +326,50 @@ class ScoringService:
     async def get_leaderboard(self, category: Optional[str] = None, difficulty: Optional[str] = None,
                              timeframe: str = "all", limit: int = 10) -> List[LeaderboardEntry]:
         """Get leaderboard"""
+        # The unfiltered all-time board is the hot read - serve it from
+        # the materialized snapshot when one exists and fall back to the
+        # live aggregation otherwise
+        if timeframe == "all" and not category and not difficulty:
+            cached = await self.db.leaderboard_cache.find({}) \
+                .sort("average_score", -1).limit(limit).to_list(length=limit)
+            if cached:
+                return self._build_leaderboard(cached)
+
         pipeline = []
-        
-        # Match criteria
-        match_criteria = {}
+
+        # Filter scores before any join so only relevant documents reach
+        # the $lookup stage
+        pre_lookup_match = {}
         if timeframe != "all":
             days_ago = {"week": 7, "month": 30, "year": 365}[timeframe]
             cutoff_date = datetime.utcnow() - timedelta(days=days_ago)
-            match_criteria["submission_time"] = {"$gte": cutoff_date}
-        
+            pre_lookup_match["submission_time"] = {"$gte": cutoff_date}
+
+        if pre_lookup_match:
+            pipeline.append({"$match": pre_lookup_match})
+
         if category or difficulty:
-            # Join with scenarios to filter by category/difficulty
+            # Join with scenarios to filter by category/difficulty; the
+            # correlated-subquery form lets the join hit the scenarios _id
+            # index and project only the two fields the filter reads
             pipeline.append({
                 "$lookup": {
                     "from": "scenarios",
-                    "localField": "scenario_id",
-                    "foreignField": "_id",
+                    "let": {"sid": "$scenario_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$_id", "$$sid"]}}},
+                        {"$project": {"category": 1, "difficulty": 1}}
+                    ],
                     "as": "scenario"
                 }
             })
-            
+
+            post_lookup_match = {}
             if category:
-                match_criteria["scenario.category"] = category
+                post_lookup_match["scenario.category"] = category
             if difficulty:
-                match_criteria["scenario.difficulty"] = difficulty
-        
-        if match_criteria:
-            pipeline.append({"$match": match_criteria})
+                post_lookup_match["scenario.difficulty"] = difficulty
+            pipeline.append({"$match": post_lookup_match})
         
         # Group by user and calculate stats
         pipeline.extend([
@@ -155,19 +383,44 @@ class ScoringService:
                 }
             },
             {"$sort": {"average_score": -1}},
-            {"$limit": limit}
+            {"$limit": limit},
+            # Join the ranked users' names server-side; user_id is stored
+            # as a string (UUID) matching users._id, so no id conversion
+            {
+                "$lookup": {
+                    "from": "users",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "user"
+                }
+            },
+            {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+            {
+                "$project": {
+                    "total_score": 1,
+                    "scenarios_completed": 1,
+                    "average_score": 1,
+                    "best_score": 1,
+                    "user.profile.first_name": 1,
+                    "user.profile.last_name": 1,
+                    "user.email": 1
+                }
+            }
         ])
-        
+
         results = await self.collection.aggregate(pipeline).to_list(length=limit)
-        
+        return self._build_leaderboard(results)
+
+    @staticmethod
+    def _build_leaderboard(results: List[dict]) -> List[LeaderboardEntry]:
+        """Build ranked entries from grouped rows with joined user docs"""
         leaderboard = []
         for rank, result in enumerate(results, 1):
-            # Get user name - user_id is already a string (UUID)
-            user = await self.db.users.find_one({"_id": result["_id"]})
+            user = result.get("user", {})
             user_name = f"{user.get('profile', {}).get('first_name', '')} {user.get('profile', {}).get('last_name', '')}".strip()
             if not user_name:
                 user_name = user.get('email', 'Anonymous').split('@')[0]
-            
+
             leaderboard.append(LeaderboardEntry(
                 user_id=result["_id"],
                 user_name=user_name,
@@ -176,40 +429,45 @@ class ScoringService:
                 average_score=result["average_score"],
                 rank=rank
             ))
-        
+
         return leaderboard
 
     async def get_user_stats(self, user_id: str) -> UserStats:
         """Get user statistics"""
-        # Get user's scores
-        user_scores = await self.collection.find({"user_id": user_id}).to_list(length=None)
-        
-        # Calculate stats
-        total_scenarios = len(user_scores)
-        completed_scenarios = len([s for s in user_scores if s["scores"]["total_score"] >= 70])
-        
-        if user_scores:
-            average_score = sum(s["scores"]["total_score"] for s in user_scores) / len(user_scores)
-            best_score = max(s["scores"]["total_score"] for s in user_scores)
-            total_time_spent = sum(s["time_spent"] for s in user_scores)
-        else:
-            average_score = 0
-            best_score = 0
-            total_time_spent = 0
-        
-        # Calculate current streak (consecutive days with activity)
-        current_streak = await self._calculate_streak(user_id)
-        
-        # Get badges - user_id is already a string (UUID), not ObjectId
-        user = await self.db.users.find_one({"_id": user_id})
-        badges_earned = user.get("progress", {}).get("badges", []) if user else []
-        
+        # Reduce the score history server-side so only one summary
+        # document crosses the wire, regardless of how many scores exist
+        stats_pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": None,
+                "total_scenarios": {"$sum": 1},
+                "completed_scenarios": {
+                    "$sum": {"$cond": [{"$gte": ["$scores.total_score", 70]}, 1, 0]}
+                },
+                "average_score": {"$avg": "$scores.total_score"},
+                "best_score": {"$max": "$scores.total_score"},
+                "total_time_spent": {"$sum": "$time_spent"}
+            }}
+        ]
+
+        # Badges are derived from the achievement collections rather than a
+        # denormalized copy on the user document
+        stats_docs, current_streak, earned_badges, legacy_badges = await asyncio.gather(
+            self.collection.aggregate(stats_pipeline).to_list(length=1),
+            self._calculate_streak(user_id),
+            self.db.user_achievements.distinct("badge_id", {"user_id": user_id}),
+            self.db.achievements.distinct("badge_id", {"user_id": user_id})
+        )
+
+        stats = stats_docs[0] if stats_docs else {}
+        badges_earned = sorted(set(earned_badges) | set(legacy_badges))
+
         return UserStats(
-            total_scenarios=total_scenarios,
-            completed_scenarios=completed_scenarios,
-            average_score=average_score,
-            best_score=best_score,
-            total_time_spent=total_time_spent,
+            total_scenarios=stats.get("total_scenarios", 0),
+            completed_scenarios=stats.get("completed_scenarios", 0),
+            average_score=stats.get("average_score") or 0,
+            best_score=stats.get("best_score") or 0,
+            total_time_spent=stats.get("total_time_spent", 0),
             current_streak=current_streak,
             badges_earned=badges_earned
         )
@@ -217,46 +475,142 @@ class ScoringService:
     async def get_user_analytics(self, user_id: str, days: int = 30) -> Dict[str, Any]:
         """Get user performance analytics"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        user_scores = await self.collection.find({
-            "user_id": user_id,
-            "submission_time": {"$gte": cutoff_date}
-        }).sort("submission_time", 1).to_list(length=None)
-        
-        # Prepare analytics data
-        daily_scores = {}
-        category_performance = {}
-        
-        for score in user_scores:
-            date_key = score["submission_time"].strftime("%Y-%m-%d")
-            if date_key not in daily_scores:
-                daily_scores[date_key] = []
-            daily_scores[date_key].append(score["scores"]["total_score"])
-            
-            # Category performance (if scenario data available)
-            if score.get("scenario_id"):
-                scenario = await self.scenario_service.get_scenario_by_id(score["scenario_id"])
-                if scenario:
-                    category = scenario.category
-                    if category not in category_performance:
-                        category_performance[category] = []
-                    category_performance[category].append(score["scores"]["total_score"])
-        
+
+        # One aggregation joins scenario categories and groups by day and
+        # by category server-side, instead of one scenario fetch per score
+        pipeline = [
+            {"$match": {
+                "user_id": user_id,
+                "submission_time": {"$gte": cutoff_date}
+            }},
+            {"$sort": {"submission_time": 1}},
+            {"$lookup": {
+                "from": "scenarios",
+                "let": {"sid": "$scenario_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$sid"]}}},
+                    {"$project": {"category": 1}}
+                ],
+                "as": "scenario"
+            }},
+            {"$unwind": {"path": "$scenario", "preserveNullAndEmptyArrays": True}},
+            {"$facet": {
+                "daily": [
+                    {"$group": {
+                        "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$submission_time"}},
+                        "avg": {"$avg": "$scores.total_score"}
+                    }}
+                ],
+                "by_category": [
+                    {"$match": {"scenario.category": {"$ne": None}}},
+                    {"$group": {"_id": "$scenario.category", "avg": {"$avg": "$scores.total_score"}}}
+                ],
+                # Weak-area helper only needs the score breakdowns
+                "scores": [
+                    {"$project": {"scores": 1, "_id": 0}}
+                ],
+                # Recent-vs-older trend scalars, computed server-side on
+                # the already-sorted totals
+                "trend": [
+                    {"$group": {"_id": None, "all": {"$push": "$scores.total_score"}, "n": {"$sum": 1}}},
+                    {"$project": {
+                        "_id": 0,
+                        "n": 1,
+                        "first": {"$arrayElemAt": ["$all", 0]},
+                        "last": {"$arrayElemAt": ["$all", -1]},
+                        "recent_avg": {"$avg": {"$slice": ["$all", -5]}},
+                        "older_avg": {"$cond": [
+                            {"$gt": ["$n", 5]},
+                            {"$avg": {"$slice": ["$all", {"$subtract": ["$n", 5]}]}},
+                            None
+                        ]}
+                    }}
+                ]
+            }}
+        ]
+
+        facets = await self.collection.aggregate(pipeline).to_list(length=1)
+        facet = facets[0] if facets else {}
+        user_scores = facet.get("scores", [])
+        trend_docs = facet.get("trend") or [{}]
+
         return {
-            "daily_scores": {date: sum(scores)/len(scores) for date, scores in daily_scores.items()},
-            "category_performance": {cat: sum(scores)/len(scores) for cat, scores in category_performance.items()},
-            "improvement_trend": await self._calculate_improvement_trend(user_scores),
+            "daily_scores": {d["_id"]: d["avg"] for d in facet.get("daily", [])},
+            "category_performance": {c["_id"]: c["avg"] for c in facet.get("by_category", [])},
+            "improvement_trend": self._trend_from_summary(trend_docs[0]),
             "weak_areas": await self._identify_weak_areas(user_scores)
         }
 
     # Private helper methods
-    async def _validate_security(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    async def _run_basic_validators(self, diagram: DiagramResponse) -> List[ValidationResult]:
+        """Run the built-in basic rule checks concurrently
+
+        The comprehensive validation service supersedes these on the live
+        scoring path; this is the composed entry point for the lightweight
+        rule set.
+        """
+        view = self._build_diagram_view(diagram)
+        sec, arch, perf, comp = await asyncio.gather(
+            self._validate_security(view),
+            self._validate_architecture(view),
+            self._validate_performance(view),
+            self._validate_completeness(view)
+        )
+        return sec + arch + perf + comp
+
+    @staticmethod
+    def _build_diagram_view(diagram: DiagramResponse) -> Dict[str, Any]:
+        """Precompute the node/edge lookups shared by the basic validators
+
+        One pass over nodes and one over edges, so each validator indexes
+        into sets instead of re-scanning and re-lowercasing the diagram.
+        """
+        nodes = diagram.diagram_data.nodes
+        edges = diagram.diagram_data.edges
+
+        auth_ids, frontend_ids, database_ids, lb_ids = set(), set(), set(), set()
+        for node in nodes:
+            ntype = node.type.lower()
+            if 'auth' in ntype:
+                auth_ids.add(node.id)
+            if 'frontend' in ntype:
+                frontend_ids.add(node.id)
+            if 'database' in ntype:
+                database_ids.add(node.id)
+            if 'load' in ntype or 'balancer' in ntype:
+                lb_ids.add(node.id)
+
+        connected_ids = set()
+        secure_edges = 0
+        # Once enough secure edges are seen to clear the 80% bar, the
+        # remaining protocol lookups/case folds can be skipped; only the
+        # id bookkeeping still needs the full pass
+        secure_threshold = len(edges) * 0.8
+        for edge in edges:
+            connected_ids.add(edge.source)
+            connected_ids.add(edge.target)
+            if secure_edges < secure_threshold and \
+                    edge.data.get('protocol', '').lower() in ('https', 'tls'):
+                secure_edges += 1
+
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "auth_ids": auth_ids,
+            "frontend_ids": frontend_ids,
+            "database_ids": database_ids,
+            "lb_ids": lb_ids,
+            "connected_ids": connected_ids,
+            "secure_edges": secure_edges,
+            "secure_threshold": secure_threshold
+        }
+
+    async def _validate_security(self, view: Dict[str, Any]) -> List[ValidationResult]:
         """Validate security aspects of the diagram"""
         results = []
-        
+
         # Check for authentication elements
-        auth_nodes = [node for node in diagram.diagram_data.nodes if 'auth' in node.type.lower()]
-        if not auth_nodes:
+        if not view["auth_ids"]:
             results.append(ValidationResult(
                 rule_id="SEC001",
                 rule_name="Authentication Required",
@@ -264,73 +618,69 @@ class ScoringService:
                 message="No authentication mechanism found in the design",
                 category="security"
             ))
-        
+
         # Check for HTTPS/TLS
-        secure_connections = [edge for edge in diagram.diagram_data.edges 
-                            if edge.data.get('protocol', '').lower() in ['https', 'tls']]
-        
-        if len(secure_connections) < len(diagram.diagram_data.edges) * 0.8:
+        if view["secure_edges"] < view["secure_threshold"]:
             results.append(ValidationResult(
-                rule_id="SEC002", 
+                rule_id="SEC002",
                 rule_name="Secure Communication",
                 severity="warning",
                 message="Many connections are not using secure protocols (HTTPS/TLS)",
                 category="security"
             ))
-        
+
         return results
 
-    async def _validate_architecture(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    async def _validate_architecture(self, view: Dict[str, Any]) -> List[ValidationResult]:
         """Validate architecture aspects"""
         results = []
-        
+
         # Check for proper separation of concerns
-        if len(diagram.diagram_data.nodes) > 1:
+        if len(view["nodes"]) > 1:
             # Look for database nodes connected directly to frontend
-            frontend_nodes = [n for n in diagram.diagram_data.nodes if 'frontend' in n.type.lower()]
-            database_nodes = [n for n in diagram.diagram_data.nodes if 'database' in n.type.lower()]
-            
-            direct_connections = [
-                edge for edge in diagram.diagram_data.edges
-                if any(edge.source == fn.id for fn in frontend_nodes) and 
-                   any(edge.target == db.id for db in database_nodes)
-            ]
-            
-            if direct_connections:
+            frontend_ids = view["frontend_ids"]
+            database_ids = view["database_ids"]
+
+            # Only the existence of a violation matters - short-circuit on
+            # the first offending edge instead of building the full list
+            has_direct_connection = any(
+                edge.source in frontend_ids and edge.target in database_ids
+                for edge in view["edges"]
+            )
+
+            if has_direct_connection:
                 results.append(ValidationResult(
                     rule_id="ARCH001",
                     rule_name="Separation of Concerns",
-                    severity="error", 
+                    severity="error",
                     message="Frontend should not connect directly to database",
                     category="architecture"
                 ))
-        
+
         return results
 
-    async def _validate_performance(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    async def _validate_performance(self, view: Dict[str, Any]) -> List[ValidationResult]:
         """Validate performance aspects"""
         results = []
-        
+
         # Check for load balancers in high-traffic scenarios
-        if len(diagram.diagram_data.nodes) > 5:  # Assume complex system
-            lb_nodes = [n for n in diagram.diagram_data.nodes if 'load' in n.type.lower() or 'balancer' in n.type.lower()]
-            if not lb_nodes:
-                results.append(ValidationResult(
-                    rule_id="PERF001",
-                    rule_name="Load Balancing",
-                    severity="warning",
-                    message="Consider adding load balancing for scalability",
-                    category="performance"
-                ))
-        
+        if len(view["nodes"]) > 5 and not view["lb_ids"]:  # Assume complex system
+            results.append(ValidationResult(
+                rule_id="PERF001",
+                rule_name="Load Balancing",
+                severity="warning",
+                message="Consider adding load balancing for scalability",
+                category="performance"
+            ))
+
         return results
 
-    async def _validate_completeness(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    async def _validate_completeness(self, view: Dict[str, Any]) -> List[ValidationResult]:
         """Validate completeness of the design"""
         results = []
-        
+
         # Check minimum required elements
-        if len(diagram.diagram_data.nodes) < 3:
+        if len(view["nodes"]) < 3:
             results.append(ValidationResult(
                 rule_id="COMP001",
                 rule_name="Design Completeness",
@@ -338,14 +688,10 @@ class ScoringService:
                 message="Design appears incomplete - minimum 3 components expected",
                 category="completeness"
             ))
-        
+
         # Check for unconnected nodes
-        connected_nodes = set()
-        for edge in diagram.diagram_data.edges:
-            connected_nodes.add(edge.source)
-            connected_nodes.add(edge.target)
-        
-        unconnected = [n for n in diagram.diagram_data.nodes if n.id not in connected_nodes]
+        connected_ids = view["connected_ids"]
+        unconnected = [n for n in view["nodes"] if n.id not in connected_ids]
         if unconnected:
             results.append(ValidationResult(
                 rule_id="COMP002",
@@ -354,7 +700,7 @@ class ScoringService:
                 message=f"{len(unconnected)} components are not connected to the system",
                 category="completeness"
             ))
-        
+
         return results
 
     async def _calculate_scores(self, diagram: DiagramResponse, validation_results: List[ValidationResult],
@@ -369,24 +715,17 @@ class ScoringService:
         else:
             security_weight = architecture_weight = performance_weight = completeness_weight = 0.25
         
-        # Base scores (start at 100, deduct for violations)
-        security_score = 100.0
-        architecture_score = 100.0
-        performance_score = 100.0
-        completeness_score = 100.0
-        
-        # Deduct points for violations
+        # Tally deductions per category in one pass, then clamp each
+        # category once instead of branching per violation
+        deductions = dict.fromkeys(_SCORE_CATEGORIES, 0)
         for result in validation_results:
-            deduction = 20 if result.severity == "error" else 10 if result.severity == "warning" else 5
-            
-            if result.category == "security":
-                security_score = max(0, security_score - deduction)
-            elif result.category == "architecture":
-                architecture_score = max(0, architecture_score - deduction)
-            elif result.category == "performance":
-                performance_score = max(0, performance_score - deduction)
-            elif result.category == "completeness":
-                completeness_score = max(0, completeness_score - deduction)
+            if result.category in deductions:
+                deductions[result.category] += _SEVERITY_PTS.get(result.severity, 5)
+
+        security_score = max(0.0, 100.0 - deductions["security"])
+        architecture_score = max(0.0, 100.0 - deductions["architecture"])
+        performance_score = max(0.0, 100.0 - deductions["performance"])
+        completeness_score = max(0.0, 100.0 - deductions["completeness"])
         
         # Calculate weighted total
         total_score = (
@@ -442,9 +781,10 @@ class ScoringService:
             recommendations.append(f"Address {warning_count} improvement opportunities")
         
         # Generate summary
-        score_level = "Excellent" if scores.total_score >= 90 else \
-                     "Good" if scores.total_score >= 70 else \
-                     "Needs Improvement" if scores.total_score >= 50 else "Poor"
+        score_level = next(
+            (name for threshold, name in _SCORE_LEVELS if scores.total_score >= threshold),
+            "Poor"
+        )
         
         summary = f"{score_level} design with a score of {scores.total_score:.1f}/100. " + \
                  f"Found {error_count} errors and {warning_count} warnings."
@@ -464,21 +804,26 @@ class ScoringService:
 
     async def _calculate_streak(self, user_id: str) -> int:
         """Calculate user's current streak of consecutive active days"""
-        # Get user's recent scores grouped by date
-        recent_scores = await self.collection.find({
-            "user_id": user_id,
-            "submission_time": {"$gte": datetime.utcnow() - timedelta(days=30)}
-        }).sort("submission_time", -1).to_list(length=None)
-        
-        if not recent_scores:
+        # Group submissions into distinct active days server-side - at
+        # most 30 tiny documents come back instead of every score
+        pipeline = [
+            {"$match": {
+                "user_id": user_id,
+                "submission_time": {"$gte": datetime.utcnow() - timedelta(days=30)}
+            }},
+            {"$group": {
+                "_id": {"$dateToString": {
+                    "format": "%Y-%m-%d", "date": "$submission_time", "timezone": "UTC"
+                }}
+            }}
+        ]
+
+        active_days = await self.collection.aggregate(pipeline).to_list(length=31)
+        activity_dates = {day["_id"] for day in active_days}
+
+        if not activity_dates:
             return 0
-        
-        # Group by date
-        activity_dates = set()
-        for score in recent_scores:
-            date_key = score["submission_time"].strftime("%Y-%m-%d")
-            activity_dates.add(date_key)
-        
+
         # Calculate streak from today backwards
         streak = 0
         current_date = datetime.utcnow().date()
@@ -529,21 +874,20 @@ class ScoringService:
         
         return suggestions
 
-    async def _calculate_improvement_trend(self, user_scores: List[dict]) -> str:
-        """Calculate if user is improving over time"""
-        if len(user_scores) < 2:
+    @staticmethod
+    def _trend_from_summary(trend: Dict[str, Any]) -> str:
+        """Classify the improvement trend from the server-side summary"""
+        count = trend.get("n", 0)
+        if count < 2:
             return "Not enough data"
-        
-        # Compare recent vs older scores
-        recent_scores = [s["scores"]["total_score"] for s in user_scores[-5:]]
-        older_scores = [s["scores"]["total_score"] for s in user_scores[:-5]] if len(user_scores) > 5 else []
-        
-        if not older_scores:
-            return "Improving" if len(recent_scores) > 1 and recent_scores[-1] > recent_scores[0] else "Stable"
-        
-        recent_avg = sum(recent_scores) / len(recent_scores)
-        older_avg = sum(older_scores) / len(older_scores)
-        
+
+        older_avg = trend.get("older_avg")
+        if older_avg is None:
+            # Too little history for a recent-vs-older split; compare the
+            # first and last submissions instead
+            return "Improving" if trend.get("last", 0) > trend.get("first", 0) else "Stable"
+
+        recent_avg = trend.get("recent_avg", 0)
         if recent_avg > older_avg + 5:
             return "Improving"
         elif recent_avg < older_avg - 5:
@@ -554,26 +898,31 @@ class ScoringService:
     async def _identify_weak_areas(self, user_scores: List[dict]) -> List[str]:
         """Identify areas where user consistently scores low"""
         weak_areas = []
-        
-        if not user_scores:
+
+        count = len(user_scores)
+        if count == 0:
             return weak_areas
-        
-        # Calculate average scores by category
-        security_scores = [s["scores"]["security_score"] for s in user_scores]
-        architecture_scores = [s["scores"]["architecture_score"] for s in user_scores]
-        performance_scores = [s["scores"]["performance_score"] for s in user_scores]
-        completeness_scores = [s["scores"]["completeness_score"] for s in user_scores]
-        
-        if sum(security_scores) / len(security_scores) < 70:
+
+        # Accumulate all four category totals in one traversal instead of
+        # building and summing four intermediate lists
+        security_total = architecture_total = performance_total = completeness_total = 0.0
+        for score in user_scores:
+            breakdown = score["scores"]
+            security_total += breakdown["security_score"]
+            architecture_total += breakdown["architecture_score"]
+            performance_total += breakdown["performance_score"]
+            completeness_total += breakdown["completeness_score"]
+
+        if security_total / count < 70:
             weak_areas.append("Security")
-        
-        if sum(architecture_scores) / len(architecture_scores) < 70:
+
+        if architecture_total / count < 70:
             weak_areas.append("Architecture")
-        
-        if sum(performance_scores) / len(performance_scores) < 70:
+
+        if performance_total / count < 70:
             weak_areas.append("Performance")
-        
-        if sum(completeness_scores) / len(completeness_scores) < 70:
+
+        if completeness_total / count < 70:
             weak_areas.append("Completeness")
-        
+
         return weak_areas
\ No newline at end of file
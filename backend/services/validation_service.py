@@ -4,313 +4,605 @@ Enhanced Validation Service with Comprehensive Threat Modeling Rules
 from typing import List, Dict, Any, Optional
 from models.diagram import DiagramResponse
 from models.score import ValidationResult
+from collections import Counter, OrderedDict, defaultdict, deque
+from functools import lru_cache
+from types import MappingProxyType
+import asyncio
+import hashlib
+import json
 import re
 
+# One compiled alternation per category, shared by every service
+# instance, so node classification runs as C-level regex scans instead
+# of nested keyword loops in every validator. The keyword sets
+# intentionally mirror the original per-rule scans, which differ subtly
+# between rules.
+_CATEGORY_PATTERNS = {
+    'auth': re.compile(r'auth|login|identity|oauth|sso'),
+    'auth_strict': re.compile(r'auth'),
+    'db': re.compile(r'database'),
+    'db_like': re.compile(r'database|db'),
+    'api': re.compile(r'api|service'),
+    'input': re.compile(r'frontend|form|input|ui'),
+    'frontend': re.compile(r'frontend'),
+    'frontend_form': re.compile(r'frontend|form'),
+    'frontend_ui': re.compile(r'frontend|ui'),
+    'input_flow': re.compile(r'frontend|input|ui'),
+    'storage': re.compile(r'database|storage'),
+    'cache': re.compile(r'cache|redis'),
+    'lb': re.compile(r'load|balancer|lb'),
+    'cdn': re.compile(r'cdn'),
+    'gateway': re.compile(r'gateway|proxy|mesh'),
+    'service_micro': re.compile(r'service|microservice'),
+    'presentation': re.compile(r'frontend|ui|web|mobile'),
+    'business': re.compile(r'api|service|business|logic'),
+    'data': re.compile(r'database|storage|cache')
+}
+
+
+# One bit per category; membership checks become a single mask test
+_CATEGORY_BITS = {name: 1 << i for i, name in enumerate(_CATEGORY_PATTERNS)}
+
+
+def _build_keyword_classifier():
+    """Compile the category keywords into one combined scan
+
+    Maps each distinct keyword to the union of its categories' bits.
+    The alternation sits inside a zero-width lookahead so matches do
+    not consume input: a keyword overlapping another occurrence (the
+    'db' inside 'loadbalancer') is still found at its own position,
+    matching the original per-category substring searches exactly.
+    Longest-first ordering plus folding the bits of keywords nested in
+    longer ones ('auth' inside 'oauth') covers the same-start-position
+    case, where the alternation can only report one group.
+    """
+    keyword_bits: Dict[str, int] = {}
+    for name, pattern in _CATEGORY_PATTERNS.items():
+        for keyword in pattern.pattern.split('|'):
+            keyword_bits[keyword] = keyword_bits.get(keyword, 0) | _CATEGORY_BITS[name]
+
+    base_bits = dict(keyword_bits)
+    for outer in keyword_bits:
+        for inner, bits in base_bits.items():
+            if inner != outer and inner in outer:
+                keyword_bits[outer] |= bits
+
+    ordered = sorted(keyword_bits, key=len, reverse=True)
+    regex = re.compile('(?=' + '|'.join(f'(?P<{kw}>{kw})' for kw in ordered) + ')')
+    return regex, keyword_bits
+
+
+_CLASSIFY_RE, _KEYWORD_BITS = _build_keyword_classifier()
+
+# Components COMP002 requires for web scenarios, matched as whole tokens
+_WEB_REQUIRED_COMPONENTS = ('frontend', 'api', 'database')
+
+_TYPE_TOKEN_RE = re.compile(r'[a-z]+')
+
+# Plaintext protocols flagged by SEC002
+_INSECURE_PROTOCOLS = frozenset(('http', 'ftp', 'telnet'))
+
+# Rule weight tables are static configuration; building them once at
+# import (read-only, shared by every instance) beats reconstructing the
+# dict literals in each __init__
+_SECURITY_RULES = MappingProxyType({
+    "authentication": {"weight": 0.25, "critical": True},
+    "encryption": {"weight": 0.20, "critical": True},
+    "authorization": {"weight": 0.20, "critical": True},
+    "input_validation": {"weight": 0.15, "critical": True},
+    "session_management": {"weight": 0.10, "critical": False},
+    "error_handling": {"weight": 0.10, "critical": False}
+})
+
+_ARCHITECTURE_RULES = MappingProxyType({
+    "separation_of_concerns": {"weight": 0.30, "critical": True},
+    "scalability": {"weight": 0.25, "critical": False},
+    "maintainability": {"weight": 0.20, "critical": False},
+    "modularity": {"weight": 0.15, "critical": False},
+    "coupling": {"weight": 0.10, "critical": False}
+})
+
+_PERFORMANCE_RULES = MappingProxyType({
+    "load_balancing": {"weight": 0.30, "critical": False},
+    "caching": {"weight": 0.25, "critical": False},
+    "database_optimization": {"weight": 0.20, "critical": False},
+    "cdn_usage": {"weight": 0.15, "critical": False},
+    "compression": {"weight": 0.10, "critical": False}
+})
+
+_COMPLETENESS_RULES = MappingProxyType({
+    "essential_components": {"weight": 0.40, "critical": True},
+    "data_flow": {"weight": 0.25, "critical": True},
+    "error_handling": {"weight": 0.20, "critical": False},
+    "monitoring": {"weight": 0.15, "critical": False}
+})
+
+# Static portion of every emitted result, keyed by rule id. The rules
+# only vary message/severity/element details per finding, so building
+# results from these via model_construct skips re-validating the fixed
+# strings on every append.
+_RESULT_TEMPLATES = {
+    "SEC001": {
+        "rule_name": "Missing Authentication", "severity": "error",
+        "message": "No authentication mechanism detected. All systems need user authentication.",
+        "category": "security", "element_type": "system"
+    },
+    "SEC002": {
+        "rule_name": "Unencrypted Communication",
+        "category": "security", "element_type": "connection"
+    },
+    "SEC003": {
+        "rule_name": "Database Encryption", "severity": "warning",
+        "category": "security", "element_type": "database"
+    },
+    "SEC004": {
+        "rule_name": "Direct Database Access", "severity": "error",
+        "message": "Frontend components should not connect directly to databases. Use API layers.",
+        "category": "security", "element_type": "database"
+    },
+    "SEC005": {
+        "rule_name": "API Authentication", "severity": "error",
+        "category": "security", "element_type": "api"
+    },
+    "SEC006": {
+        "rule_name": "API Rate Limiting", "severity": "warning",
+        "category": "security", "element_type": "api"
+    },
+    "SEC007": {
+        "rule_name": "Input Validation", "severity": "error",
+        "category": "security", "element_type": "frontend"
+    },
+    "ARCH001": {
+        "rule_name": "Missing Business Layer", "severity": "warning",
+        "message": "Consider adding a business/service layer between presentation and data layers.",
+        "category": "architecture", "element_type": "system"
+    },
+    "ARCH002": {
+        "rule_name": "Single Point of Failure", "severity": "error",
+        "category": "architecture"
+    },
+    "ARCH003": {
+        "rule_name": "Circular Dependencies", "severity": "warning",
+        "category": "architecture", "element_type": "system"
+    },
+    "ARCH004": {
+        "rule_name": "Missing API Gateway", "severity": "warning",
+        "message": "Microservices architecture should include an API Gateway or service mesh.",
+        "category": "architecture", "element_type": "system"
+    },
+    "PERF001": {
+        "rule_name": "Missing Load Balancer", "severity": "warning",
+        "message": "Complex systems should implement load balancing for scalability.",
+        "category": "performance", "element_type": "system"
+    },
+    "PERF002": {
+        "rule_name": "Missing Caching Layer", "severity": "warning",
+        "message": "Consider adding caching to improve database performance.",
+        "category": "performance", "element_type": "system"
+    },
+    "PERF003": {
+        "rule_name": "Missing CDN", "severity": "info",
+        "message": "Consider using a CDN for static assets to improve loading times.",
+        "category": "performance", "element_type": "system"
+    },
+    "PERF004": {
+        "rule_name": "Database Indexing", "severity": "warning",
+        "category": "performance", "element_type": "database"
+    },
+    "COMP001": {
+        "rule_name": "Insufficient Components", "severity": "error",
+        "message": "A complete system design should have at least 3 components.",
+        "category": "completeness", "element_type": "system"
+    },
+    "COMP002": {
+        "rule_name": "Missing Essential Components", "severity": "error",
+        "category": "completeness", "element_type": "system"
+    },
+    "COMP003": {
+        "rule_name": "Orphaned Components", "severity": "warning",
+        "category": "completeness", "element_type": "system"
+    },
+    "COMP004": {
+        "rule_name": "Incomplete Data Flow", "severity": "warning",
+        "message": "The system should show complete data flow from user input to data storage.",
+        "category": "completeness", "element_type": "system"
+    },
+    "OWASP001": {
+        "rule_name": "Broken Access Control (A01)", "severity": "error",
+        "message": "System lacks proper access control mechanisms.",
+        "category": "security", "element_type": "system"
+    },
+    "OWASP002": {
+        "rule_name": "Cryptographic Failures (A02)", "severity": "error",
+        "category": "security"
+    },
+    "OWASP003": {
+        "rule_name": "Injection Vulnerabilities (A03)", "severity": "error",
+        "category": "security"
+    },
+    "STRIDE001": {
+        "rule_name": "Spoofing Threat", "severity": "error",
+        "message": "System vulnerable to spoofing - implement strong authentication.",
+        "category": "security", "element_type": "system"
+    },
+    "STRIDE002": {
+        "rule_name": "Tampering Threat", "severity": "warning",
+        "message": "Communications lack integrity protection - use digital signatures or HMAC.",
+        "category": "security", "element_type": "connection"
+    },
+    "STRIDE003": {
+        "rule_name": "Repudiation Threat", "severity": "warning",
+        "message": "System lacks audit logging - implement comprehensive logging.",
+        "category": "security", "element_type": "system"
+    },
+    "STRIDE004": {
+        "rule_name": "Information Disclosure Threat", "severity": "warning",
+        "category": "security"
+    }
+}
+
+
+# Results keyed by a hash of diagram content plus scenario context.
+# Resubmissions of unchanged diagrams are common (students iterate on
+# feedback), and rule evaluation is pure, so identical input yields the
+# cached findings. Module-level because routers build a fresh service
+# per request. LRU, capped.
+_result_cache: "OrderedDict[bytes, List[ValidationResult]]" = OrderedDict()
+_RESULT_CACHE_MAX = 256
+
+
+def clear_validation_cache() -> None:
+    """Drop all cached validation results (e.g. after rule changes)"""
+    _result_cache.clear()
+
+
+def _result_cache_key(diagram: DiagramResponse, scenario_context: Optional[Dict]) -> bytes:
+    payload = json.dumps(
+        {"diagram": diagram.diagram_data.dict(), "context": scenario_context},
+        sort_keys=True,
+        default=str
+    ).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _make_result(rule_id: str, **overrides) -> ValidationResult:
+    """Build a ValidationResult from its rule template plus overrides
+
+    model_construct skips pydantic validation, which is safe here
+    because every field is a literal from the template or a string
+    formatted at the call site.
+    """
+    return ValidationResult.model_construct(
+        rule_id=rule_id, **{**_RESULT_TEMPLATES[rule_id], **overrides}
+    )
+
+
+@lru_cache(maxsize=512)
+def _type_tokens(type_lc: str) -> frozenset:
+    """Split a lowercased node type into its alphabetic tokens
+
+    Set membership on tokens avoids the false positives of substring
+    matching (e.g. 'api' inside 'rapid') and is memoized alongside
+    _classify_type since the same type strings recur across diagrams.
+    """
+    return frozenset(_TYPE_TOKEN_RE.findall(type_lc))
+
+
+@lru_cache(maxsize=512)
+def _classify_type(type_lc: str) -> int:
+    """Classify one lowercased node type into a category bitmask
+
+    One overlapping pass of the combined keyword regex replaces a
+    search per category pattern; each hit ORs in the bits of every
+    category that keyword belongs to. Node types repeat heavily across
+    diagrams, so the result is memoized process-wide.
+    """
+    mask = 0
+    for mo in _CLASSIFY_RE.finditer(type_lc):
+        mask |= _KEYWORD_BITS[mo.lastgroup]
+    return mask
+
 
 class ThreatModelingValidationService:
     """Advanced validation service for threat modeling scenarios"""
-    
+
     def __init__(self):
         self.security_rules = self._initialize_security_rules()
         self.architecture_rules = self._initialize_architecture_rules()
         self.performance_rules = self._initialize_performance_rules()
         self.completeness_rules = self._initialize_completeness_rules()
+        self._category_patterns = _CATEGORY_PATTERNS
     
     async def validate_comprehensive(self, diagram: DiagramResponse, scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
         """Perform comprehensive threat modeling validation"""
-        all_results = []
-        
-        # Security validations (most critical)
-        security_results = await self._validate_security_comprehensive(diagram, scenario_context)
-        all_results.extend(security_results)
-        
-        # Architecture validations
-        architecture_results = await self._validate_architecture_comprehensive(diagram, scenario_context)
-        all_results.extend(architecture_results)
-        
-        # Performance validations
-        performance_results = await self._validate_performance_comprehensive(diagram, scenario_context)
-        all_results.extend(performance_results)
-        
-        # Completeness validations
-        completeness_results = await self._validate_completeness_comprehensive(diagram, scenario_context)
-        all_results.extend(completeness_results)
-        
-        # OWASP Top 10 checks
-        owasp_results = await self._validate_owasp_top10(diagram)
-        all_results.extend(owasp_results)
-        
-        # STRIDE threat model checks
-        stride_results = await self._validate_stride_threats(diagram)
-        all_results.extend(stride_results)
-        
-        return all_results
-    
-    async def _validate_security_comprehensive(self, diagram: DiagramResponse, scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
-        """Comprehensive security validation"""
-        results = []
+        cache_key = _result_cache_key(diagram, scenario_context)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            _result_cache.move_to_end(cache_key)
+            # Copy so callers can extend/sort without poisoning the cache
+            return list(cached)
+
+        ctx = self._build_validation_context(diagram)
+        # Resolve the scenario category once; category-conditional rules
+        # read this instead of re-digging into scenario_context
+        ctx["scenario_category"] = scenario_context.get('category') if scenario_context else None
+
+        # The rule sets are pure CPU work - running them on the default
+        # thread pool keeps large diagrams from blocking the event loop,
+        # and the gather overlaps them. Results keep the security-first
+        # order.
+        sec, arch, perf, comp, owasp, stride = await asyncio.gather(
+            asyncio.to_thread(self._validate_security_comprehensive, ctx, scenario_context),
+            asyncio.to_thread(self._validate_architecture_comprehensive, ctx, scenario_context),
+            asyncio.to_thread(self._validate_performance_comprehensive, ctx, scenario_context),
+            asyncio.to_thread(self._validate_completeness_comprehensive, ctx, scenario_context),
+            asyncio.to_thread(self._validate_owasp_top10, ctx),
+            asyncio.to_thread(self._validate_stride_threats, ctx)
+        )
+
+        results = [*sec, *arch, *perf, *comp, *owasp, *stride]
+        _result_cache[cache_key] = results
+        if len(_result_cache) > _RESULT_CACHE_MAX:
+            _result_cache.popitem(last=False)
+        return list(results)
+
+    def _build_validation_context(self, diagram: DiagramResponse) -> Dict[str, Any]:
+        """Precompute the per-diagram data shared by all validators
+
+        Every rule scans node types case-insensitively; folding each type
+        once and classifying it against the compiled category patterns
+        means the sub-validators test category bits instead of rerunning
+        keyword loops over the same strings.
+        """
         nodes = diagram.diagram_data.nodes
         edges = diagram.diagram_data.edges
-        
+        types_lc = [n.type.lower() for n in nodes]
+        masks = [_classify_type(t) for t in types_lc]
+        # Materialize each category's node subset once; several
+        # validators read the same subsets (db, frontend, input) and
+        # previously rebuilt them with their own comprehensions
+        subsets = {
+            name: [n for n, m in zip(nodes, masks) if m & bit]
+            for name, bit in _CATEGORY_BITS.items()
+        }
+        # System-wide booleans that several rules re-derive from node
+        # data (SEC001/OWASP001, STRIDE001, STRIDE003); one sweep here
+        # replaces an any() scan per rule
+        has_access_control = False
+        has_data_auth = False
+        has_logging = False
+        for n in nodes:
+            data = n.data
+            if data.get('access_control', False):
+                has_access_control = True
+            if data.get('authentication', False):
+                has_data_auth = True
+            if data.get('logging', False) or data.get('audit_trail', False):
+                has_logging = True
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "types_lc": types_lc,
+            "masks": masks,
+            "subsets": subsets,
+            "has_access_control": has_access_control,
+            "has_data_auth": has_data_auth,
+            "has_logging": has_logging,
+            "graph": self._build_graph_index(nodes, edges)
+        }
+
+    @staticmethod
+    def _build_graph_index(nodes: List, edges: List) -> Dict[str, Any]:
+        """Index edges by endpoint in one pass
+
+        Gives validators O(1) node lookup and per-node incident edges
+        instead of rescanning the full edge list per node.
+        """
+        out_edges = defaultdict(list)
+        in_edges = defaultdict(list)
+        # Plain-id successor lists for the graph kernels (Tarjan, BFS):
+        # walking string ids avoids a pydantic attribute hop per edge
+        succ = defaultdict(list)
+        self_loops = set()
+        for edge in edges:
+            out_edges[edge.source].append(edge)
+            in_edges[edge.target].append(edge)
+            succ[edge.source].append(edge.target)
+            if edge.source == edge.target:
+                self_loops.add(edge.source)
+        # Counter.update over an iterable counts in C, cheaper than
+        # per-edge += inside the Python loop above
+        degree = Counter(e.source for e in edges)
+        degree.update(e.target for e in edges)
+
+        return {
+            "node_by_id": {n.id: n for n in nodes},
+            "out": out_edges,
+            "in": in_edges,
+            "succ": succ,
+            "self_loops": self_loops,
+            "degree": degree
+        }
+
+    def _validate_security_comprehensive(self, ctx: Dict[str, Any], scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
+        """Comprehensive security validation"""
+        results = []
+        edges = ctx["edges"]
+        subsets = ctx["subsets"]
+
         # 1. Authentication & Authorization
-        auth_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['auth', 'login', 'identity', 'oauth', 'sso'])]
+        auth_nodes = subsets['auth']
         if not auth_nodes:
-            results.append(ValidationResult(
-                rule_id="SEC001",
-                rule_name="Missing Authentication",
-                severity="error",
-                message="No authentication mechanism detected. All systems need user authentication.",
-                category="security",
-                element_type="system"
-            ))
+            results.append(_make_result("SEC001"))
         
-        # 2. Encryption in Transit
-        unencrypted_connections = []
+        # 2. Encryption in Transit - only the count feeds the finding,
+        # so tally instead of accumulating edge ids
+        unencrypted_count = 0
         for edge in edges:
             protocol = edge.data.get('protocol', '').lower()
-            if protocol in ['http', 'ftp', 'telnet'] or (not protocol and not edge.data.get('encrypted', False)):
-                unencrypted_connections.append(edge.id)
-        
-        if unencrypted_connections:
-            results.append(ValidationResult(
-                rule_id="SEC002",
-                rule_name="Unencrypted Communication",
-                severity="error" if len(unencrypted_connections) > len(edges) * 0.5 else "warning",
-                message=f"Found {len(unencrypted_connections)} unencrypted connections. Use HTTPS/TLS for all communications.",
-                category="security",
-                element_type="connection"
+            if protocol in _INSECURE_PROTOCOLS or (not protocol and not edge.data.get('encrypted', False)):
+                unencrypted_count += 1
+
+        if unencrypted_count:
+            results.append(_make_result(
+                "SEC002",
+                severity="error" if unencrypted_count > len(edges) * 0.5 else "warning",
+                message=f"Found {unencrypted_count} unencrypted connections. Use HTTPS/TLS for all communications."
             ))
         
         # 3. Database Security
-        db_nodes = [n for n in nodes if 'database' in n.type.lower() or 'db' in n.type.lower()]
+        db_nodes = subsets['db_like']
+        frontend_ids = {n.id for n in subsets['frontend']}
         for db_node in db_nodes:
             # Check if database has encryption at rest
             if not db_node.data.get('encrypted_at_rest', False):
-                results.append(ValidationResult(
-                    rule_id="SEC003",
-                    rule_name="Database Encryption",
-                    severity="warning",
+                results.append(_make_result(
+                    "SEC003",
                     message=f"Database '{db_node.data.get('label', db_node.id)}' should have encryption at rest enabled.",
-                    category="security",
-                    element_id=db_node.id,
-                    element_type="database"
+                    element_id=db_node.id
                 ))
             
             # Check for direct database access from frontend
-            direct_access = [e for e in edges if e.target == db_node.id and 
-                           any(n.id == e.source and 'frontend' in n.type.lower() for n in nodes)]
+            direct_access = [e for e in ctx["graph"]["in"].get(db_node.id, ())
+                             if e.source in frontend_ids]
             if direct_access:
-                results.append(ValidationResult(
-                    rule_id="SEC004",
-                    rule_name="Direct Database Access",
-                    severity="error",
-                    message="Frontend components should not connect directly to databases. Use API layers.",
-                    category="security",
-                    element_id=db_node.id,
-                    element_type="database"
-                ))
+                results.append(_make_result("SEC004", element_id=db_node.id))
         
         # 4. API Security
-        api_nodes = [n for n in nodes if 'api' in n.type.lower() or 'service' in n.type.lower()]
+        api_nodes = subsets['api']
         for api_node in api_nodes:
             # Check for API authentication
             if not api_node.data.get('requires_auth', False):
-                results.append(ValidationResult(
-                    rule_id="SEC005",
-                    rule_name="API Authentication",
-                    severity="error",
+                results.append(_make_result(
+                    "SEC005",
                     message=f"API '{api_node.data.get('label', api_node.id)}' should require authentication.",
-                    category="security",
-                    element_id=api_node.id,
-                    element_type="api"
+                    element_id=api_node.id
                 ))
             
             # Check for rate limiting
             if not api_node.data.get('rate_limited', False):
-                results.append(ValidationResult(
-                    rule_id="SEC006",
-                    rule_name="API Rate Limiting",
-                    severity="warning",
+                results.append(_make_result(
+                    "SEC006",
                     message=f"API '{api_node.data.get('label', api_node.id)}' should implement rate limiting.",
-                    category="security",
-                    element_id=api_node.id,
-                    element_type="api"
+                    element_id=api_node.id
                 ))
         
         # 5. Input Validation
-        user_input_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['frontend', 'form', 'input', 'ui'])]
+        user_input_nodes = subsets['input']
         for input_node in user_input_nodes:
             if not input_node.data.get('input_validation', False):
-                results.append(ValidationResult(
-                    rule_id="SEC007",
-                    rule_name="Input Validation",
-                    severity="error",
+                results.append(_make_result(
+                    "SEC007",
                     message=f"Component '{input_node.data.get('label', input_node.id)}' should validate all user inputs.",
-                    category="security",
-                    element_id=input_node.id,
-                    element_type="frontend"
+                    element_id=input_node.id
                 ))
         
         return results
     
-    async def _validate_architecture_comprehensive(self, diagram: DiagramResponse, scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
+    def _validate_architecture_comprehensive(self, ctx: Dict[str, Any], scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
         """Comprehensive architecture validation"""
         results = []
-        nodes = diagram.diagram_data.nodes
-        edges = diagram.diagram_data.edges
-        
+        nodes = ctx["nodes"]
+        edges = ctx["edges"]
+        masks = ctx["masks"]
+
         # 1. Layered Architecture
-        layers = self._identify_architectural_layers(nodes)
+        layers = self._identify_architectural_layers(nodes, masks)
         if len(layers.get('presentation', [])) > 0 and len(layers.get('business', [])) == 0:
-            results.append(ValidationResult(
-                rule_id="ARCH001",
-                rule_name="Missing Business Layer",
-                severity="warning",
-                message="Consider adding a business/service layer between presentation and data layers.",
-                category="architecture",
-                element_type="system"
-            ))
+            results.append(_make_result("ARCH001"))
         
         # 2. Single Points of Failure
-        critical_nodes = self._identify_critical_nodes(nodes, edges)
+        critical_nodes = self._identify_critical_nodes(nodes, ctx["graph"])
+        node_by_id = ctx["graph"]["node_by_id"]
         for node_id in critical_nodes:
-            node = next((n for n in nodes if n.id == node_id), None)
+            node = node_by_id.get(node_id)
             if node and not node.data.get('redundancy', False):
-                results.append(ValidationResult(
-                    rule_id="ARCH002",
-                    rule_name="Single Point of Failure",
-                    severity="error",
+                results.append(_make_result(
+                    "ARCH002",
                     message=f"Critical component '{node.data.get('label', node.id)}' lacks redundancy.",
-                    category="architecture",
                     element_id=node.id,
                     element_type=node.type
                 ))
         
         # 3. Circular Dependencies
-        circular_deps = self._detect_circular_dependencies(nodes, edges)
+        circular_deps = self._detect_circular_dependencies(nodes, ctx["graph"])
         if circular_deps:
-            results.append(ValidationResult(
-                rule_id="ARCH003",
-                rule_name="Circular Dependencies",
-                severity="warning",
-                message=f"Detected circular dependencies between: {', '.join(circular_deps)}",
-                category="architecture",
-                element_type="system"
+            results.append(_make_result(
+                "ARCH003",
+                message=f"Detected circular dependencies between: {', '.join(circular_deps)}"
             ))
         
         # 4. Microservices Best Practices (if applicable)
-        service_nodes = [n for n in nodes if 'service' in n.type.lower() or 'microservice' in n.type.lower()]
+        service_nodes = ctx["subsets"]['service_micro']
         if len(service_nodes) > 3:  # Assuming microservices architecture
             # Check for service mesh/API gateway
-            gateway_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['gateway', 'proxy', 'mesh'])]
+            gateway_nodes = ctx["subsets"]['gateway']
             if not gateway_nodes:
-                results.append(ValidationResult(
-                    rule_id="ARCH004",
-                    rule_name="Missing API Gateway",
-                    severity="warning",
-                    message="Microservices architecture should include an API Gateway or service mesh.",
-                    category="architecture",
-                    element_type="system"
-                ))
+                results.append(_make_result("ARCH004"))
         
         return results
     
-    async def _validate_performance_comprehensive(self, diagram: DiagramResponse, scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
+    def _validate_performance_comprehensive(self, ctx: Dict[str, Any], scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
         """Comprehensive performance validation"""
         results = []
-        nodes = diagram.diagram_data.nodes
-        edges = diagram.diagram_data.edges
-        
+        nodes = ctx["nodes"]
+        subsets = ctx["subsets"]
+
         # 1. Load Balancing
         if len(nodes) > 5:  # Complex system
-            lb_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['load', 'balancer', 'lb'])]
+            lb_nodes = subsets['lb']
             if not lb_nodes:
-                results.append(ValidationResult(
-                    rule_id="PERF001",
-                    rule_name="Missing Load Balancer",
-                    severity="warning",
-                    message="Complex systems should implement load balancing for scalability.",
-                    category="performance",
-                    element_type="system"
-                ))
+                results.append(_make_result("PERF001"))
         
         # 2. Caching Strategy
-        cache_nodes = [n for n in nodes if 'cache' in n.type.lower() or 'redis' in n.type.lower()]
-        db_nodes = [n for n in nodes if 'database' in n.type.lower()]
+        cache_nodes = subsets['cache']
+        db_nodes = subsets['db']
         
         if len(db_nodes) > 0 and len(cache_nodes) == 0:
-            results.append(ValidationResult(
-                rule_id="PERF002",
-                rule_name="Missing Caching Layer",
-                severity="warning",
-                message="Consider adding caching to improve database performance.",
-                category="performance",
-                element_type="system"
-            ))
+            results.append(_make_result("PERF002"))
         
         # 3. CDN for Static Assets
-        frontend_nodes = [n for n in nodes if 'frontend' in n.type.lower() or 'ui' in n.type.lower()]
-        cdn_nodes = [n for n in nodes if 'cdn' in n.type.lower()]
+        frontend_nodes = subsets['frontend_ui']
+        cdn_nodes = subsets['cdn']
         
         if len(frontend_nodes) > 0 and len(cdn_nodes) == 0:
-            results.append(ValidationResult(
-                rule_id="PERF003",
-                rule_name="Missing CDN",
-                severity="info",
-                message="Consider using a CDN for static assets to improve loading times.",
-                category="performance",
-                element_type="system"
-            ))
+            results.append(_make_result("PERF003"))
         
         # 4. Database Optimization
         for db_node in db_nodes:
             if not db_node.data.get('indexed', False):
-                results.append(ValidationResult(
-                    rule_id="PERF004",
-                    rule_name="Database Indexing",
-                    severity="warning",
+                results.append(_make_result(
+                    "PERF004",
                     message=f"Database '{db_node.data.get('label', db_node.id)}' should have proper indexing.",
-                    category="performance",
-                    element_id=db_node.id,
-                    element_type="database"
+                    element_id=db_node.id
                 ))
         
         return results
     
-    async def _validate_completeness_comprehensive(self, diagram: DiagramResponse, scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
+    def _validate_completeness_comprehensive(self, ctx: Dict[str, Any], scenario_context: Optional[Dict] = None) -> List[ValidationResult]:
         """Comprehensive completeness validation"""
         results = []
-        nodes = diagram.diagram_data.nodes
-        edges = diagram.diagram_data.edges
+        nodes = ctx["nodes"]
+        edges = ctx["edges"]
+        types_lc = ctx["types_lc"]
         
         # 1. Minimum System Components
         if len(nodes) < 3:
-            results.append(ValidationResult(
-                rule_id="COMP001",
-                rule_name="Insufficient Components",
-                severity="error",
-                message="A complete system design should have at least 3 components.",
-                category="completeness",
-                element_type="system"
-            ))
+            results.append(_make_result("COMP001"))
         
         # 2. Essential Components for Web Applications
-        if scenario_context and scenario_context.get('category') == 'web':
-            required_components = ['frontend', 'api', 'database']
-            missing_components = []
-            
-            for component in required_components:
-                if not any(component in n.type.lower() for n in nodes):
-                    missing_components.append(component)
-            
+        if ctx["scenario_category"] == 'web':
+            present_tokens = set()
+            for t in types_lc:
+                present_tokens |= _type_tokens(t)
+
+            missing_components = [c for c in _WEB_REQUIRED_COMPONENTS
+                                  if c not in present_tokens]
+
             if missing_components:
-                results.append(ValidationResult(
-                    rule_id="COMP002",
-                    rule_name="Missing Essential Components",
-                    severity="error",
-                    message=f"Web application missing: {', '.join(missing_components)}",
-                    category="completeness",
-                    element_type="system"
+                results.append(_make_result(
+                    "COMP002",
+                    message=f"Web application missing: {', '.join(missing_components)}"
                 ))
         
         # 3. Orphaned Components
@@ -321,125 +613,76 @@ class ThreatModelingValidationService:
         
         orphaned_nodes = [n for n in nodes if n.id not in connected_nodes]
         if orphaned_nodes:
-            results.append(ValidationResult(
-                rule_id="COMP003",
-                rule_name="Orphaned Components",
-                severity="warning",
-                message=f"{len(orphaned_nodes)} components are not connected to the system.",
-                category="completeness",
-                element_type="system"
+            results.append(_make_result(
+                "COMP003",
+                message=f"{len(orphaned_nodes)} components are not connected to the system."
             ))
         
         # 4. Data Flow Completeness
-        if not self._has_complete_data_flow(nodes, edges):
-            results.append(ValidationResult(
-                rule_id="COMP004",
-                rule_name="Incomplete Data Flow",
-                severity="warning",
-                message="The system should show complete data flow from user input to data storage.",
-                category="completeness",
-                element_type="system"
-            ))
+        if not self._has_complete_data_flow(ctx):
+            results.append(_make_result("COMP004"))
         
         return results
     
-    async def _validate_owasp_top10(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    def _validate_owasp_top10(self, ctx: Dict[str, Any]) -> List[ValidationResult]:
         """Validate against OWASP Top 10 vulnerabilities"""
         results = []
-        nodes = diagram.diagram_data.nodes
-        edges = diagram.diagram_data.edges
-        
+        nodes = ctx["nodes"]
+
         # A01: Broken Access Control
-        if not any('auth' in n.type.lower() or n.data.get('access_control', False) for n in nodes):
-            results.append(ValidationResult(
-                rule_id="OWASP001",
-                rule_name="Broken Access Control (A01)",
-                severity="error",
-                message="System lacks proper access control mechanisms.",
-                category="security",
-                element_type="system"
-            ))
+        if not ctx["subsets"]['auth_strict'] and not ctx["has_access_control"]:
+            results.append(_make_result("OWASP001"))
         
         # A02: Cryptographic Failures
         sensitive_data_nodes = [n for n in nodes if n.data.get('stores_sensitive_data', False)]
         for node in sensitive_data_nodes:
             if not node.data.get('encrypted', False):
-                results.append(ValidationResult(
-                    rule_id="OWASP002", 
-                    rule_name="Cryptographic Failures (A02)",
-                    severity="error",
+                results.append(_make_result(
+                    "OWASP002",
                     message=f"Sensitive data in '{node.data.get('label', node.id)}' should be encrypted.",
-                    category="security",
                     element_id=node.id,
                     element_type=node.type
                 ))
         
         # A03: Injection
-        user_input_nodes = [n for n in nodes if 'frontend' in n.type.lower() or 'form' in n.type.lower()]
+        user_input_nodes = ctx["subsets"]['frontend_form']
         for node in user_input_nodes:
             if not node.data.get('input_validation', False) and not node.data.get('prepared_statements', False):
-                results.append(ValidationResult(
-                    rule_id="OWASP003",
-                    rule_name="Injection Vulnerabilities (A03)",
-                    severity="error",
+                results.append(_make_result(
+                    "OWASP003",
                     message=f"'{node.data.get('label', node.id)}' needs input validation and prepared statements.",
-                    category="security",
                     element_id=node.id,
                     element_type=node.type
                 ))
         
         return results
     
-    async def _validate_stride_threats(self, diagram: DiagramResponse) -> List[ValidationResult]:
+    def _validate_stride_threats(self, ctx: Dict[str, Any]) -> List[ValidationResult]:
         """Validate using STRIDE threat modeling methodology"""
         results = []
-        nodes = diagram.diagram_data.nodes
-        edges = diagram.diagram_data.edges
+        nodes = ctx["nodes"]
+        edges = ctx["edges"]
         
         # Spoofing
-        if not any(n.data.get('authentication', False) for n in nodes):
-            results.append(ValidationResult(
-                rule_id="STRIDE001",
-                rule_name="Spoofing Threat",
-                severity="error",
-                message="System vulnerable to spoofing - implement strong authentication.",
-                category="security",
-                element_type="system"
-            ))
+        if not ctx["has_data_auth"]:
+            results.append(_make_result("STRIDE001"))
         
         # Tampering
         unprotected_connections = [e for e in edges if not e.data.get('integrity_protection', False)]
         if len(unprotected_connections) > 0:
-            results.append(ValidationResult(
-                rule_id="STRIDE002",
-                rule_name="Tampering Threat",
-                severity="warning",
-                message="Communications lack integrity protection - use digital signatures or HMAC.",
-                category="security",
-                element_type="connection"
-            ))
+            results.append(_make_result("STRIDE002"))
         
         # Repudiation
-        if not any(n.data.get('logging', False) or n.data.get('audit_trail', False) for n in nodes):
-            results.append(ValidationResult(
-                rule_id="STRIDE003",
-                rule_name="Repudiation Threat",
-                severity="warning",
-                message="System lacks audit logging - implement comprehensive logging.",
-                category="security",
-                element_type="system"
-            ))
+        if not ctx["has_logging"]:
+            results.append(_make_result("STRIDE003"))
         
         # Information Disclosure
         public_facing_nodes = [n for n in nodes if n.data.get('public_facing', False)]
         for node in public_facing_nodes:
             if not node.data.get('data_minimization', False):
-                results.append(ValidationResult(
-                    rule_id="STRIDE004",
-                    rule_name="Information Disclosure Threat",
-                    severity="warning",
+                results.append(_make_result(
+                    "STRIDE004",
                     message=f"Public component '{node.data.get('label', node.id)}' should minimize exposed data.",
-                    category="security",
                     element_id=node.id,
                     element_type=node.type
                 ))
@@ -447,105 +690,145 @@ class ThreatModelingValidationService:
         return results
     
     # Helper methods
-    def _identify_architectural_layers(self, nodes: List) -> Dict[str, List]:
+    def _identify_architectural_layers(self, nodes: List, masks: List[int]) -> Dict[str, List]:
         """Identify architectural layers in the system"""
         layers = {
             'presentation': [],
             'business': [],
             'data': []
         }
-        
-        for node in nodes:
-            node_type = node.type.lower()
-            if any(keyword in node_type for keyword in ['frontend', 'ui', 'web', 'mobile']):
+
+        presentation_bit = _CATEGORY_BITS['presentation']
+        business_bit = _CATEGORY_BITS['business']
+        data_bit = _CATEGORY_BITS['data']
+        for node, m in zip(nodes, masks):
+            if m & presentation_bit:
                 layers['presentation'].append(node)
-            elif any(keyword in node_type for keyword in ['api', 'service', 'business', 'logic']):
+            elif m & business_bit:
                 layers['business'].append(node)
-            elif any(keyword in node_type for keyword in ['database', 'storage', 'cache']):
+            elif m & data_bit:
                 layers['data'].append(node)
-        
+
         return layers
     
-    def _identify_critical_nodes(self, nodes: List, edges: List) -> List[str]:
+    def _identify_critical_nodes(self, nodes: List, graph: Dict[str, Any]) -> List[str]:
         """Identify nodes that are critical to system operation"""
-        # Count connections for each node
-        connection_count = {}
-        for node in nodes:
-            connection_count[node.id] = sum(1 for edge in edges if edge.source == node.id or edge.target == node.id)
-        
-        # Nodes with high connectivity are critical
-        avg_connections = sum(connection_count.values()) / len(connection_count) if connection_count else 0
-        critical_nodes = [node_id for node_id, count in connection_count.items() if count > avg_connections * 1.5]
-        
-        return critical_nodes
+        if not nodes:
+            return []
+
+        # Nodes with high connectivity are critical; unconnected nodes
+        # have degree 0 and can never clear the threshold, so iterating
+        # the degree counter alone is equivalent to walking all nodes
+        degree = graph["degree"]
+        avg_connections = sum(degree.values()) / len(nodes)
+        return [node_id for node_id, count in degree.items() if count > avg_connections * 1.5]
     
-    def _detect_circular_dependencies(self, nodes: List, edges: List) -> List[str]:
-        """Detect circular dependencies in the system"""
-        # Simple cycle detection using DFS
-        # This is a simplified version - a full implementation would use graph algorithms
-        circular_deps = []
-        
-        # Build adjacency list
-        adj_list = {node.id: [] for node in nodes}
-        for edge in edges:
-            adj_list[edge.source].append(edge.target)
-        
-        # Basic circular dependency detection (simplified)
-        for node in nodes:
-            for target in adj_list[node.id]:
-                if node.id in adj_list.get(target, []):
-                    circular_deps.append(f"{node.id} ↔ {target}")
-        
-        return circular_deps
+    def _detect_circular_dependencies(self, nodes: List, graph: Dict[str, Any]) -> List[str]:
+        """Detect circular dependencies in the system
+
+        Iterative Tarjan strongly-connected-components over the directed
+        dependency graph: every component with more than one node (or a
+        self-loop) is a cycle. Runs in O(V + E) on the prebuilt
+        successor-id lists; the previous pairwise check was O(V * E) and
+        only found two-node cycles.
+        """
+        adj = graph["succ"]
+        self_loops = graph["self_loops"]
+
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        counter = 0
+        cycles = []
+
+        for root in nodes:
+            if root.id in index:
+                continue
+
+            index[root.id] = lowlink[root.id] = counter
+            counter += 1
+            stack.append(root.id)
+            on_stack.add(root.id)
+            # Explicit DFS stack of (node id, successor iterator) frames
+            work = [(root.id, iter(adj.get(root.id, ())))]
+
+            while work:
+                current, successors = work[-1]
+                pushed_child = False
+                for target in successors:
+                    if target not in index:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(adj.get(target, ()))))
+                        pushed_child = True
+                        break
+                    elif target in on_stack:
+                        lowlink[current] = min(lowlink[current], index[target])
+
+                if pushed_child:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[current])
+
+                if lowlink[current] == index[current]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == current:
+                            break
+                    if len(component) > 1 or component[0] in self_loops:
+                        cycles.append(" ↔ ".join(reversed(component)))
+
+        return cycles
     
-    def _has_complete_data_flow(self, nodes: List, edges: List) -> bool:
-        """Check if system has complete data flow"""
-        # Check if there's a path from user input to data storage
-        input_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['frontend', 'input', 'ui'])]
-        storage_nodes = [n for n in nodes if any(keyword in n.type.lower() for keyword in ['database', 'storage'])]
-        
-        if not input_nodes or not storage_nodes:
+    def _has_complete_data_flow(self, ctx: Dict[str, Any]) -> bool:
+        """Check if system has complete data flow
+
+        Multi-source BFS from the user-input nodes over the directed
+        edges; the flow is complete when some storage node is reachable.
+        Replaces the old edge-count heuristic, which accepted any
+        sufficiently dense graph regardless of actual connectivity.
+        """
+        input_ids = [n.id for n in ctx["subsets"]['input_flow']]
+        storage_ids = {n.id for n in ctx["subsets"]['storage']}
+
+        if not input_ids or not storage_ids:
             return False
-        
-        # Simplified path checking - in a real implementation, use graph traversal
-        return len(edges) >= len(nodes) - 1  # At least a connected graph
+
+        succ = ctx["graph"]["succ"]
+        visited = set(input_ids)
+        queue = deque(input_ids)
+        while queue:
+            current = queue.popleft()
+            if current in storage_ids:
+                return True
+            for target in succ.get(current, ()):
+                if target not in visited:
+                    visited.add(target)
+                    queue.append(target)
+
+        return False
     
     def _initialize_security_rules(self) -> Dict[str, Dict]:
         """Initialize security validation rules"""
-        return {
-            "authentication": {"weight": 0.25, "critical": True},
-            "encryption": {"weight": 0.20, "critical": True},
-            "authorization": {"weight": 0.20, "critical": True},
-            "input_validation": {"weight": 0.15, "critical": True},
-            "session_management": {"weight": 0.10, "critical": False},
-            "error_handling": {"weight": 0.10, "critical": False}
-        }
-    
+        return _SECURITY_RULES
+
     def _initialize_architecture_rules(self) -> Dict[str, Dict]:
         """Initialize architecture validation rules"""
-        return {
-            "separation_of_concerns": {"weight": 0.30, "critical": True},
-            "scalability": {"weight": 0.25, "critical": False},
-            "maintainability": {"weight": 0.20, "critical": False},
-            "modularity": {"weight": 0.15, "critical": False},
-            "coupling": {"weight": 0.10, "critical": False}
-        }
-    
+        return _ARCHITECTURE_RULES
+
     def _initialize_performance_rules(self) -> Dict[str, Dict]:
         """Initialize performance validation rules"""
-        return {
-            "load_balancing": {"weight": 0.30, "critical": False},
-            "caching": {"weight": 0.25, "critical": False},
-            "database_optimization": {"weight": 0.20, "critical": False},
-            "cdn_usage": {"weight": 0.15, "critical": False},
-            "compression": {"weight": 0.10, "critical": False}
-        }
-    
+        return _PERFORMANCE_RULES
+
     def _initialize_completeness_rules(self) -> Dict[str, Dict]:
         """Initialize completeness validation rules"""
-        return {
-            "essential_components": {"weight": 0.40, "critical": True},
-            "data_flow": {"weight": 0.25, "critical": True},
-            "error_handling": {"weight": 0.20, "critical": False},
-            "monitoring": {"weight": 0.15, "critical": False}
-        }
\ No newline at end of file
+        return _COMPLETENESS_RULES
\ No newline at end of file